@@ -2,11 +2,11 @@
 import asyncio
 from datetime import timedelta
 import logging
-import threading
-from typing import Optional, Any
+import math
+import time
 
 import homeassistant.helpers.config_validation as cv
-from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.event import async_call_later
 import voluptuous as vol
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import (
@@ -17,22 +17,71 @@ from homeassistant.const import (
     Platform,
 )
 from homeassistant.core import HomeAssistant, callback
-
-from pyModbusTCP.client import ModbusClient
+from homeassistant.exceptions import ConfigEntryNotReady
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.debounce import Debouncer
+from homeassistant.helpers.device_registry import CONNECTION_NETWORK_MAC, format_mac
+from homeassistant.helpers.storage import Store
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+import homeassistant.util.dt as dt_util
+from homeassistant.util import slugify
 
 from .const import (
+    ATTR_MANUFACTURER,
+    CONF_ADAPTIVE_POLLING,
+    CONF_CAPTURE,
+    CONF_FORCE_UPDATE_INTERVAL,
+    CONF_IDENTITY,
+    CONF_MAX_READ_GAP,
+    CONF_MAX_SCAN_INTERVAL,
+    CONF_MIN_SCAN_INTERVAL,
+    CONF_PIPELINE_DEPTH,
+    CONF_UNIT_ID,
+    DATA_SCHEDULER,
+    DEFAULT_ADAPTIVE_POLLING,
+    DEFAULT_CAPTURE,
+    DEFAULT_FORCE_UPDATE_INTERVAL,
+    DEFAULT_MAX_SCAN_INTERVAL,
+    DEFAULT_MIN_SCAN_INTERVAL,
     DEFAULT_NAME,
     DEFAULT_PORT,
     DOMAIN,
     DEFAULT_SCAN_INTERVAL,
+    NORMAL_SCAN_INTERVAL,
+    NUMBER_TYPES,
+    REFRESH_COOLDOWN,
+    SENSOR_TYPES,
+    SLOW_SCAN_INTERVAL,
+    SNAPSHOT_SAVE_INTERVAL,
+    STORAGE_VERSION,
+    SWITCH_TYPES,
     UNKNOWN_MODEL,
-    AlfaFields,
-    ExtButtonFields,
-    ExtSensorFields,
-    UIFields,
-    SensorFields,
+    WRITE_DEBOUNCE,
     DEVICE_MODEL,
+    peripheral_sensor_descriptions,
+)
+from .capture import TrafficRecorder
+from .metrics import Histogram
+from .modbus import (
+    DEFAULT_PIPELINE_DEPTH,
+    DEFAULT_UNIT_ID,
+    READ_HOLDING_REGISTERS,
+    READ_INPUT_REGISTERS,
+    RequestPriority,
 )
+from .registers import (
+    COUNTDOWN_TOLERANCE,
+    DEFAULT_MAX_READ_GAP,
+    REGISTERS,
+    RegisterGroup,
+    RegisterTable,
+    connected_peripherals,
+    plan_reads,
+    plan_writes,
+    presence_registers,
+)
+from .scheduler import FuturaScheduler
+from .store import FuturaData
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -43,7 +92,29 @@ FUTURA_MODBUS_SCHEMA = vol.Schema(
         vol.Optional(CONF_PORT, default=DEFAULT_PORT): cv.string,
         vol.Optional(
             CONF_SCAN_INTERVAL, default=DEFAULT_SCAN_INTERVAL
+        ): vol.All(vol.Coerce(int), vol.Range(min=1)),
+        vol.Optional(
+            CONF_MAX_READ_GAP, default=DEFAULT_MAX_READ_GAP
+        ): cv.positive_int,
+        vol.Optional(
+            CONF_PIPELINE_DEPTH, default=DEFAULT_PIPELINE_DEPTH
+        ): vol.All(vol.Coerce(int), vol.Range(min=1)),
+        vol.Optional(CONF_UNIT_ID, default=DEFAULT_UNIT_ID): vol.All(
+            vol.Coerce(int), vol.Range(min=0, max=255)
+        ),
+        vol.Optional(
+            CONF_FORCE_UPDATE_INTERVAL, default=DEFAULT_FORCE_UPDATE_INTERVAL
         ): cv.positive_int,
+        vol.Optional(
+            CONF_ADAPTIVE_POLLING, default=DEFAULT_ADAPTIVE_POLLING
+        ): cv.boolean,
+        vol.Optional(
+            CONF_MIN_SCAN_INTERVAL, default=DEFAULT_MIN_SCAN_INTERVAL
+        ): vol.All(vol.Coerce(int), vol.Range(min=1)),
+        vol.Optional(
+            CONF_MAX_SCAN_INTERVAL, default=DEFAULT_MAX_SCAN_INTERVAL
+        ): vol.All(vol.Coerce(int), vol.Range(min=1)),
+        vol.Optional(CONF_CAPTURE, default=DEFAULT_CAPTURE): cv.boolean,
     }
 )
 
@@ -53,10 +124,64 @@ CONFIG_SCHEMA = vol.Schema(
 
 PLATFORMS = [Platform.SENSOR, Platform.NUMBER, Platform.SWITCH]
 
+_MISSING = object()
+
+DEVICE_COUNTERS = ("mbdev_stat_reads", "mbdev_stat_writes", "mbdev_stat_fails")
+
+
+def _within(delta, band):
+    """Return True if delta does not exceed band, ignoring float noise."""
+    return delta <= band or math.isclose(delta, band)
+
+
+def _confirmed(actual, written, countdown):
+    """Return True if the word read back shows the written one was applied.
+
+    A countdown may have ticked down by up to COUNTDOWN_TOLERANCE since.
+    """
+    if countdown:
+        return 0 <= written - actual <= COUNTDOWN_TOLERANCE
+    return actual == written
+
+
+def _fail_writes(pending):
+    """Resolve the futures of pending writes still waiting with False."""
+    for _, futures in pending.values():
+        for future in futures:
+            if not future.done():
+                future.set_result(False)
+
+
+def _dependencies(descriptions):
+    """Return the keys of the registers the entities of descriptions read."""
+    keys = set()
+    for description in descriptions:
+        keys.add(description.key)
+        keys.update(getattr(description, "registers", ()))
+    return keys
+
+
+def _significant(description, last_value, value):
+    """Return True if value differs from last_value beyond the deadbands."""
+    if value == last_value:
+        return False
+    if not isinstance(value, (int, float)) or not isinstance(
+        last_value, (int, float)
+    ):
+        return True
+    delta = abs(value - last_value)
+    deadband = getattr(description, "deadband", None)
+    if deadband and _within(delta, deadband):
+        return False
+    deadband_percent = getattr(description, "deadband_percent", None)
+    if deadband_percent and _within(delta, abs(last_value) * deadband_percent / 100):
+        return False
+    return True
+
 
 async def async_setup(hass, config):
     """Setup the Jablotron Futura modbus component."""
-    hass.data[DOMAIN] = {}
+    hass.data[DOMAIN] = {DATA_SCHEDULER: FuturaScheduler()}
     return True
 
 
@@ -69,681 +194,868 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
 
     _LOGGER.debug("Setup %s.%s", DOMAIN, name)
 
-    hub = FuturaModbusHub(hass, name, host, port, scan_interval)
+    hub = FuturaModbusHub(
+        hass,
+        name,
+        host,
+        port,
+        scan_interval,
+        max_read_gap=entry.data.get(CONF_MAX_READ_GAP, DEFAULT_MAX_READ_GAP),
+        pipeline_depth=entry.data.get(CONF_PIPELINE_DEPTH, DEFAULT_PIPELINE_DEPTH),
+        unit_id=entry.data.get(CONF_UNIT_ID, DEFAULT_UNIT_ID),
+        force_update_interval=entry.data.get(
+            CONF_FORCE_UPDATE_INTERVAL, DEFAULT_FORCE_UPDATE_INTERVAL
+        ),
+        adaptive_polling=entry.data.get(
+            CONF_ADAPTIVE_POLLING, DEFAULT_ADAPTIVE_POLLING
+        ),
+        min_scan_interval=entry.data.get(
+            CONF_MIN_SCAN_INTERVAL, DEFAULT_MIN_SCAN_INTERVAL
+        ),
+        max_scan_interval=entry.data.get(
+            CONF_MAX_SCAN_INTERVAL, DEFAULT_MAX_SCAN_INTERVAL
+        ),
+        storage_key=_storage_key(entry),
+        scheduler=hass.data[DOMAIN][DATA_SCHEDULER],
+        capture_path=(
+            hass.config.path(f"{DOMAIN}_{slugify(name)}.capture.jsonl")
+            if entry.data.get(CONF_CAPTURE, DEFAULT_CAPTURE)
+            else None
+        ),
+    )
+    await hub.async_start_capture()
+    identity = entry.data.get(CONF_IDENTITY)
+    if identity is None:
+        identity = await hub.async_read_identity()
+        if identity is not None:
+            hass.config_entries.async_update_entry(
+                entry, data={**entry.data, CONF_IDENTITY: identity}
+            )
+    snapshot = await hub.async_load_snapshot()
+    if identity is None or not await hub.async_discover_peripherals(snapshot):
+        await hub.async_shutdown()
+        raise ConfigEntryNotReady(f"Unable to reach {name} at {host}:{port}")
+    hub.async_set_identity(identity)
+    hub.async_restore_snapshot(snapshot)
+    await _async_migrate_unique_ids(hass, entry, name, hub.unique_id)
     hass.data[DOMAIN][name] = {"hub": hub}
+    hass.data[DOMAIN][DATA_SCHEDULER].async_add_hub(hub)
+    hub.async_expect(_enabled_descriptions(hass, entry, hub))
 
-    for component in PLATFORMS:
-        hass.async_create_task(
-            hass.config_entries.async_forward_entry_setup(entry, component)
-        )
+    # poll while the platforms are set up, so entities start with live values
+    await asyncio.gather(
+        hub.async_refresh(),
+        hass.config_entries.async_forward_entry_setups(entry, PLATFORMS),
+    )
     return True
 
 
+def _enabled_descriptions(hass, entry, hub):
+    """Return the descriptions of the entities of hub that will be enabled."""
+    registry = er.async_get(hass)
+    entities = {
+        entity.unique_id: entity
+        for entity in er.async_entries_for_config_entry(registry, entry.entry_id)
+    }
+    descriptions = [
+        *SENSOR_TYPES.values(),
+        *NUMBER_TYPES.values(),
+        *SWITCH_TYPES.values(),
+    ]
+    for peripheral in hub.peripherals:
+        descriptions.extend(peripheral_sensor_descriptions(peripheral))
+
+    enabled = []
+    for description in descriptions:
+        entity = entities.get(f"{hub.unique_id}_{description.key}")
+        if entity is None:
+            if description.entity_registry_enabled_default:
+                enabled.append(description)
+        elif not entity.disabled:
+            enabled.append(description)
+    return enabled
+
+
+def _storage_key(entry):
+    """Return the key of the snapshot store of entry."""
+    return f"{DOMAIN}.{entry.entry_id}"
+
+
+async def _async_migrate_unique_ids(hass, entry, old_prefix, new_prefix):
+    """Move entities keyed by the hub name over to the device serial."""
+    if old_prefix == new_prefix:
+        return
+
+    @callback
+    def _migrate(entity_entry):
+        unique_id = entity_entry.unique_id
+        if unique_id.startswith(f"{new_prefix}_") or not unique_id.startswith(
+            f"{old_prefix}_"
+        ):
+            return None
+        return {"new_unique_id": f"{new_prefix}{unique_id[len(old_prefix):]}"}
+
+    await er.async_migrate_entries(hass, entry.entry_id, _migrate)
+
+
 async def async_unload_entry(hass, entry):
     """Unload Futura modbus entry."""
-    unload_ok = all(
-        await asyncio.gather(
-            *[
-                hass.config_entry.async_forward_entry_unload(entry, component)
-                for component in PLATFORMS
-            ]
-        )
-    )
+    unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
     if not unload_ok:
         return False
 
-    hass.data[DOMAIN].pop(entry.data["name"])
+    hub = hass.data[DOMAIN].pop(entry.data["name"])["hub"]
+    hass.data[DOMAIN][DATA_SCHEDULER].async_remove_hub(hub)
+    await hub.async_shutdown()
     return True
 
 
-class FuturaModbusHub:
-    """Wrapper class for pymodbus for Futura."""
-
-    def __init__(self, hass, name, host, port, scan_interval):
+async def async_remove_entry(hass, entry):
+    """Remove the snapshot saved for a deleted entry."""
+    await Store(hass, STORAGE_VERSION, _storage_key(entry)).async_remove()
+
+
+class FuturaModbusHub(DataUpdateCoordinator[FuturaData]):
+    """Polls a Futura unit for the registers its entities need.
+
+    Entities listen with their description as context, and each poll reads
+    only the registers behind the descriptions of the current listeners.
+    Refresh requests coming in while a poll runs, or within REFRESH_COOLDOWN
+    of one, are served by a single poll, and the listeners are only called
+    when a poll changed a value.
+    """
+
+    def __init__(
+        self,
+        hass,
+        name,
+        host,
+        port,
+        scan_interval,
+        max_read_gap=DEFAULT_MAX_READ_GAP,
+        pipeline_depth=DEFAULT_PIPELINE_DEPTH,
+        unit_id=DEFAULT_UNIT_ID,
+        force_update_interval=DEFAULT_FORCE_UPDATE_INTERVAL,
+        adaptive_polling=DEFAULT_ADAPTIVE_POLLING,
+        min_scan_interval=DEFAULT_MIN_SCAN_INTERVAL,
+        max_scan_interval=DEFAULT_MAX_SCAN_INTERVAL,
+        storage_key=None,
+        scheduler=None,
+        capture_path=None,
+    ):
         """Initialize the modbus hub."""
-        self._hass = hass
-        self._client = ModbusClient(host=host, port=port, timeout=5)
-        self._lock = threading.Lock()
-        self._name = name
-        self._scan_interval = timedelta(seconds=scan_interval)
-        self._unsub_interval_method = None
-        self._sensors = []
-        self.data = {}
+        super().__init__(
+            hass,
+            _LOGGER,
+            name=name,
+            update_interval=timedelta(seconds=scan_interval),
+            request_refresh_debouncer=Debouncer(
+                hass, _LOGGER, cooldown=REFRESH_COOLDOWN, immediate=True
+            ),
+            always_update=False,
+        )
+        self._scheduler = scheduler or FuturaScheduler()
+        # hubs behind the same gateway share its connection
+        self._client = self._scheduler.pool.acquire(
+            host, port, unit_id, timeout=5, pipeline_depth=pipeline_depth
+        )
+        self._scan_interval = scan_interval
+        self._adaptive_polling = adaptive_polling
+        self._min_scan_interval = min_scan_interval
+        self._max_scan_interval = max_scan_interval
+        # interval of the fast group, varied between the bounds when adaptive
+        self._poll_interval = scan_interval
+        self._next_due = {}
+        self._max_read_gap = max_read_gap
+        self._force_update_interval = force_update_interval
+        self._last_forced_update = time.monotonic()
+        # set while the listeners publish regardless of deadbands
+        self._publish_all = False
+        self._publish_keys = frozenset()
+        self._force_publish = False
+        # timers publishing values held back by their min publish interval
+        self._unsub_trailing = {}
+        self._published_state = (True, False)
+        self._read_plans = {}
+        self._expected = None
+        self._pending_writes = {}
+        self._flushing = set()
+        # holding addresses written since the poll cycle started, whose
+        # polled values may predate the write
+        self._written = set()
+        self._unsub_write_flush = None
+        self._poll_reads = []
+        self.identity = {}
+        self._store = Store(hass, STORAGE_VERSION, storage_key or f"{DOMAIN}.{name}")
+        self._save_pending = False
+        self._last_update = None
+        # values restored from the last run, until the first poll succeeds
+        self.stale = False
+        self.snapshot_time = None
+        self._register_map = dict(REGISTERS)
+        self.peripherals = []
+        self.data = FuturaData()
+        self.cycle_time = Histogram()
+        self.failed_cycles = 0
+        self._metrics_listeners = []
+        self._recorder = None if capture_path is None else TrafficRecorder(capture_path)
 
     @callback
-    def async_add_futura_modbus_sensor(self, update_callback):
-        """Listen for data updates."""
-        # This is the first sensor, set up interval.
-        if not self._sensors:
-            self._unsub_interval_method = async_track_time_interval(
-                self._hass, self.async_refresh_modbus_data, self._scan_interval
-            )
+    def async_add_listener(self, update_callback, context=None):
+        """Listen for updates, reading the registers context depends on."""
+        remove_listener = super().async_add_listener(update_callback, context)
+        self._read_plans.clear()
+        missing = [
+            self._register_map[key]
+            for key in (_dependencies((context,)) if context is not None else ())
+            if key in self._register_map and key not in self.data
+        ]
+        if missing and self._last_update is not None:
+            # read newly needed registers right away, not in their group's tick
+            for register in missing:
+                self._next_due.pop(register.group, None)
+            self.hass.async_create_task(self.async_request_refresh())
+
+        @callback
+        def remove():
+            remove_listener()
+            self._read_plans.clear()
 
-        self._sensors.append(update_callback)
+        return remove
 
     @callback
-    def async_remove_futura_modbus_sensor(self, update_callback):
-        """Remove data update."""
-        if update_callback in self._sensors:
-            self._sensors.remove(update_callback)
-
-        if not self._sensors:
-            if self._unsub_interval_method is not None:
-                self._unsub_interval_method()
-                self._unsub_interval_method = None
-            self.close()
-
-    async def async_refresh_modbus_data(self, _now: Optional[int] = None) -> bool:
-        """Time to update."""
-        if not self._sensors:
+    def _schedule_refresh(self):
+        """Schedule the next tick at the phase of the hub in its interval.
+
+        The ticks of hubs with the same interval are spread evenly over it,
+        so they take turns instead of polling together.
+        """
+        super()._schedule_refresh()
+        if self._unsub_refresh is None:
             return
+        self._unsub_refresh()
+        now = time.monotonic()
+        next_tick = self._scheduler.align(
+            self, now + self._poll_interval, self._poll_interval
+        )
+        self._unsub_refresh = async_call_later(
+            self.hass, max(0, next_tick - now), self._handle_refresh_interval
+        )
 
-        update_result = await self._hass.async_add_executor_job(self.read_modbus_data)
-
-        if update_result:
-            for update_callback in self._sensors:
+    @callback
+    def async_expect(self, descriptions):
+        """Read the registers of the entities of descriptions in the first poll.
+
+        These are the entities about to subscribe, so registers of disabled
+        entities are not read even before the entities are added.
+        """
+        self._expected = list(descriptions)
+
+    async def _async_update_data(self):
+        """Read the registers of the groups due and return the new values.
+
+        The first poll also reads the registers of the entities expected to
+        subscribe, or the whole map if none are, so they find their values
+        without waiting a tick.
+        """
+        start = time.perf_counter()
+        try:
+            now = time.monotonic()
+            groups = self._due_groups(now)
+            if self._last_update is None:
+                if self._expected is None:
+                    registers = self._register_map.values()
+                else:
+                    registers = self._registers(
+                        [*self._expected, *self.async_contexts()]
+                    )
+                plan = plan_reads(
+                    (register for register in registers if register.group in groups),
+                    self._max_read_gap,
+                )
+            else:
+                plan = self.read_plan(groups)
+            values, failed, skipped = await self._async_read_plan(plan)
+            update_result = not failed
+            if not update_result:
+                self.failed_cycles += 1
+        finally:
+            self.cycle_time.observe(time.perf_counter() - start)
+            for update_callback in list(self._metrics_listeners):
                 update_callback()
 
-        return True
-
-    @property
-    def name(self):
-        """Return the name of the hub."""
-        return self._name
-
-    def close(self):
-        """Disconnect client."""
-        with self._lock:
-            self._client.close()
-
-    def read_holding_registers(self, address, count):
-        """Read holding registers."""
-        with self._lock:
-            return self._client.read_holding_registers(address, count)
-
-    def read_input_registers(self, address, count):
-        """Read input registers."""
-        with self._lock:
-            return self._client.read_input_registers(address, count)
-
-    def read_modbus_data(self):
-        """Read data from modbus."""
-        return self.read_modbus_info()
-
-    def write_register(self, address: int, value: int):
-        """Write modbus register."""
-        with self._lock:
-            ret = self._client.write_single_register(
-                address,
-                value,
-            )
-
-            return ret
-
-    def read_modbus_info(self):
-        """Read the modbus registers."""
-        temp_humi_data = self.read_input_registers(address=30, count=8)
-        if temp_humi_data is None:
-            return False
-
-        self.data["fut_temp_ambient"] = temp_humi_data[0] * 0.1
-        self.data["fut_temp_fresh"] = temp_humi_data[1] * 0.1
-        self.data["fut_temp_indoor"] = temp_humi_data[2] * 0.1
-        self.data["fut_temp_waste"] = temp_humi_data[3] * 0.1
-
-        self.data["fut_humi_ambient"] = temp_humi_data[4] * 0.1
-        self.data["fut_humi_fresh"] = temp_humi_data[5] * 0.1
-        self.data["fut_humi_indoor"] = temp_humi_data[6] * 0.1
-        self.data["fut_humi_waste"] = temp_humi_data[7] * 0.1
-
-        power_data = self.read_input_registers(address=41, count=3)
-        if power_data is None:
-            return False
-
-        self.data["fut_power_consumption"] = power_data[0]
-        self.data["fut_heat_recovering"] = power_data[1]
-        self.data["fut_heating_power"] = power_data[2]
-
-        holding_regs = self.read_holding_registers(address=1, count=16)
-        if holding_regs is None:
-            return False
-
-        self.data["func_boost_tm"] = round(holding_regs[0] / 60, 0)
-        self.data["cfg_bypass_enable"] = round(holding_regs[13], 0)
-        self.data["cfg_heating_enable"] = round(holding_regs[14], 0)
-        self.data["cfg_cooling_enable"] = round(holding_regs[15], 0)
-
-        return True
-
-    """def read_modbus_holding_registers(self):
-        global_reg_count = 24
-        global_data = self.read_holding_registers(
-            unit=1, address=0x0, count=global_reg_count
+        # groups whose reads made way for a write stay due for the next tick
+        if not (skipped and update_result):
+            for group in groups:
+                self._next_due[group] = now + (
+                    self._group_interval(group)
+                    if update_result
+                    else min(self._poll_interval, self._group_interval(group))
+                )
+        # a dead unit behind a gateway fails every read while the socket is up
+        if failed and (failed + skipped == len(plan) or not self._client.is_open):
+            raise UpdateFailed(self._client.last_error)
+
+        previous, data = self.data, self.data.evolve(values)
+        was_stale = self.stale
+        # a tick with nothing due read nothing to judge the values by
+        if plan and update_result and not skipped:
+            self.stale = False
+            self._last_update = dt_util.utcnow()
+            self._adapt_poll_interval(self._significant_changes(previous, data))
+            self._async_save_snapshot()
+        self._force_publish = bool(
+            self._force_update_interval
+            and now - self._last_forced_update >= self._force_update_interval
         )
+        if self._force_publish:
+            self._last_forced_update = now
+        # have the coordinator call the listeners even if nothing changed,
+        # also to drop the restored flag when the polled values are the same
+        self.always_update = self._force_publish or self.stale != was_stale
+        return data
 
-        if global_data.isError():
-            return False
+    @callback
+    def async_add_metrics_listener(self, update_callback):
+        """Call update_callback after every poll cycle, return the remover."""
+        self._metrics_listeners.append(update_callback)
+        return lambda: self._metrics_listeners.remove(update_callback)
 
-        decoder = BinaryPayloadDecoder.fromRegisters(
-            global_data.register, byteorder=Endian.Big
+    @property
+    def client_metrics(self):
+        """Return the metrics of the client's request path."""
+        return self._client.metrics
+
+    async def async_diagnostics(self):
+        """Return the state and metrics of the hub as plain data.
+
+        The unit's own request counters are read for the occasion, as they
+        are only polled while their sensors are enabled.
+        """
+        counters = {}
+        plan = plan_reads(
+            (self._register_map[key] for key in DEVICE_COUNTERS), self._max_read_gap
+        )
+        for block in plan:
+            payload = await self.async_read_block(block)
+            if payload is not None:
+                counters.update(block.decode(payload))
+        return {
+            "available": self.last_update_success,
+            "stale": self.stale,
+            "snapshot_time": self.snapshot_time,
+            "last_update": self._last_update,
+            "poll_interval": self._poll_interval,
+            "pipeline_depth": self._client.client.pipeline_depth,
+            "unit_id": self._client.unit_id,
+            "last_error": self._client.last_error,
+            "peripherals": [peripheral.key for peripheral in self.peripherals],
+            "read_plan": [
+                {
+                    "table": block.table.name,
+                    "address": block.address,
+                    "count": block.count,
+                }
+                for block in self.read_plan()
+            ],
+            "poll_cycles": {
+                "failed": self.failed_cycles,
+                "time": self.cycle_time.as_dict(),
+            },
+            "client": self.client_metrics.as_dict(),
+            "device": {key: counters.get(key) for key in DEVICE_COUNTERS},
+        }
+
+    def _group_interval(self, group):
+        """Return the current polling interval of group in seconds."""
+        if group is RegisterGroup.STATIC:
+            return math.inf
+        if group is RegisterGroup.SLOW:
+            return max(self._scan_interval, SLOW_SCAN_INTERVAL)
+        if group is RegisterGroup.NORMAL and not self._adaptive_polling:
+            return max(self._scan_interval, NORMAL_SCAN_INTERVAL)
+        return self._poll_interval
+
+    def _due_groups(self, now):
+        """Return the register groups to read in the tick at now."""
+        # fold groups due within half a fast interval into this tick
+        horizon = now + self._poll_interval / 2
+        # static registers are read once at setup, never polled
+        return frozenset(
+            group
+            for group in RegisterGroup
+            if group is not RegisterGroup.STATIC
+            and self._next_due.get(group, 0) <= horizon
         )
 
-        # 0
-        func_ventilation = decoder.decode_16bit_uint()
-        self.data["func_ventilation"] = func_ventilation
-
-        # 1
-        func_boost_tm = decoder.decode_16bit_uint()
-        self.data["func_boost_tm"] = func_boost_tm
-
-        # 2
-        func_circulation_tm = decoder.decode_16bit_uint()
-        self.data["func_circulation_tm"] = func_circulation_tm
-
-        # 3
-        func_overpressure_tm = decoder.decode_16bit_uint()
-        self.data["func_overpressure_tm"] = func_overpressure_tm
-
-        # 4
-        func_night_tm = decoder.decode_16bit_uint()
-        self.data["func_night_tm"] = func_night_tm
-
-        # 5
-        func_party_tm = decoder.decode_16bit_uint()
-        self.data["func_party_tm"] = func_party_tm
-
-        # 6-7
-        func_away_begin = decoder.decode_32bit_uint()
-        self.data["func_away_begin"] = func_away_begin
-
-        # 8-9
-        func_away_end = decoder.decode_32bit_uint()
-        self.data["func_away_end"] = func_away_end
-
-        # 10
-        cfg_temp_set = decoder.decode_16bit_uint()
-        self.data["cfg_temp_set"] = round(cfg_temp_set * 0.1, 1)
-
-        # 11
-        cfg_humi_set = decoder.decode_16bit_uint()
-        self.data["cfg_humi_set"] = round(cfg_humi_set * 0.1, 1)
-
-        # 12
-        func_time_prog = decoder.decode_16bit_uint()
-        self.data["func_time_prog"] = 1 if func_time_prog != 0 else 0
+    def _adapt_poll_interval(self, changed):
+        """Speed up polling while monitored values change, back off otherwise."""
+        if not self._adaptive_polling:
+            return
+        if any(
+            key in self._register_map
+            and self._register_map[key].group
+            in (RegisterGroup.FAST, RegisterGroup.NORMAL)
+            for key in changed
+        ):
+            self._poll_interval = self._min_scan_interval
+        else:
+            self._poll_interval = min(
+                self._poll_interval * 2, self._max_scan_interval
+            )
+        self.update_interval = timedelta(seconds=self._poll_interval)
 
-        # 13
-        func_antiradon = decoder.decode_16bit_uint()
-        self.data["func_antiradon"] = 1 if func_antiradon != 0 else 0
+    @callback
+    def _async_poll_soon(self):
+        """Poll right away, and at the fastest rate if adaptive, after a write."""
+        if self._adaptive_polling:
+            self._poll_interval = self._min_scan_interval
+            self.update_interval = timedelta(seconds=self._poll_interval)
+        # the write may have changed more than the registers read back
+        now = time.monotonic()
+        for group in (RegisterGroup.FAST, RegisterGroup.NORMAL):
+            self._next_due[group] = now
+        self.hass.async_create_task(self.async_request_refresh())
 
-        # 14
-        cfg_bypass_enable = decoder.decode_16bit_uint()
-        self.data["cfg_bypass_enable"] = 1 if cfg_bypass_enable != 0 else 0
+    @callback
+    def async_update_listeners(self):
+        """Call the listeners, publishing all values when they are due.
+
+        That is the case when the device became reachable or unreachable,
+        when restored values were replaced by polled ones and when the force
+        update interval has passed.
+        """
+        state = (self.last_update_success, self.stale)
+        self._publish_all = self._force_publish or state != self._published_state
+        self._published_state = state
+        self._force_publish = False
+        try:
+            super().async_update_listeners()
+        finally:
+            self._publish_all = False
 
-        # 15
-        cfg_heating_enable = decoder.decode_16bit_uint()
-        self.data["cfg_heating_enable"] = 1 if cfg_heating_enable != 0 else 0
+    @callback
+    def _async_publish_keys(self, keys):
+        """Publish the current values of keys regardless of their deadbands."""
+        self._publish_keys = frozenset(keys)
+        try:
+            super().async_update_listeners()
+        finally:
+            self._publish_keys = frozenset()
+
+    def should_publish(self, description, published, value):
+        """Return True if an entity should publish value.
+
+        published is the value and monotonic time the entity published last,
+        None if it has not published yet.
+        """
+        if (
+            published is None
+            or self._publish_all
+            or description.key in self._publish_keys
+        ):
+            return True
+        last_value, last_time = published
+        if value == last_value:
+            return False
+        significant = _significant(description, last_value, value)
+        min_interval = getattr(description, "min_publish_interval", None)
+        if min_interval:
+            wait = last_time + min_interval - time.monotonic()
+            if wait > 0:
+                if significant:
+                    # the values may stop changing before the interval is up
+                    self._async_publish_later(description.key, wait)
+                return False
+        return significant
 
-        # 16
-        cfg_cooling_enable = decoder.decode_16bit_uint()
-        self.data["cfg_cooling_enable"] = 1 if cfg_cooling_enable != 0 else 0
+    @callback
+    def _async_publish_later(self, key, delay):
+        """Publish the value of key after delay, unless already scheduled."""
+        if key in self._unsub_trailing:
+            return
 
-        # 17
-        cfg_comfort_enable = decoder.decode_16bit_uint()
-        self.data["cfg_comfort_enable"] = 1 if cfg_comfort_enable != 0 else 0
+        @callback
+        def _publish(_now):
+            del self._unsub_trailing[key]
+            self._async_publish_keys((key,))
+
+        self._unsub_trailing[key] = async_call_later(self.hass, delay, _publish)
+
+    def _significant_changes(self, previous, data):
+        """Return the listened keys whose value changed beyond its deadband."""
+        return {
+            description.key
+            for description in self.async_contexts()
+            if _significant(
+                description,
+                previous.get(description.key),
+                data.get(description.key),
+            )
+        }
 
-        decoder.skip_bytes(2 * 2)  # 18->20
+    @property
+    def unique_id(self):
+        """Return the prefix of the unique ids of the entities of the hub."""
+        serial_number = self.identity.get("fact_serial_number")
+        return self.name if serial_number is None else str(serial_number)
 
-        # 20
-        vzv_cb_priority_control = decoder.decode_16bit_uint()
-        self.data["vzv_cb_priority_control"] = 1 if vzv_cb_priority_control != 0 else 0
+    @property
+    def device_info(self):
+        """Return the device info of the Futura unit."""
+        device_info = {
+            "identifiers": {(DOMAIN, self.name)},
+            "name": self.name,
+            "manufacturer": ATTR_MANUFACTURER,
+            "model": DEVICE_MODEL.get(self.identity.get("sys_options"), UNKNOWN_MODEL),
+        }
+        if "fact_serial_number" in self.identity:
+            device_info["serial_number"] = str(self.identity["fact_serial_number"])
+        mac_words = [self.identity.get(f"fact_ethernet_mac_{n}") for n in (1, 2, 3)]
+        if None not in mac_words:
+            mac = "".join(f"{word:04x}" for word in mac_words)
+            device_info["connections"] = {(CONNECTION_NETWORK_MAC, format_mac(mac))}
+        return device_info
 
-        # 21
-        vzv_kitchenhood_normally_open = decoder.decode_16bit_uint()
-        self.data["vzv_kitchenhood_normally_open"] = (
-            1 if vzv_kitchenhood_normally_open != 0 else 0
+    @callback
+    def async_set_identity(self, identity):
+        """Use the identity registers read at setup or cached in the entry."""
+        self.identity = dict(identity)
+        self.data.update(
+            {key: value for key, value in identity.items() if key in REGISTERS}
         )
 
-        # 22
-        vzv_boost_volume_per_run = decoder.decode_16bit_uint()
-        self.data["vzv_boost_volume_per_run"] = (
-            1 if vzv_boost_volume_per_run != 0 else 0
+    async def async_read_identity(self):
+        """Read the static identity registers, None if the device is unreachable."""
+        identity = {}
+        for block in plan_reads(
+            (
+                register
+                for register in REGISTERS.values()
+                if register.group is RegisterGroup.STATIC
+            ),
+            self._max_read_gap,
+        ):
+            payload = await self.async_read_block(block)
+            if payload is None:
+                return None
+            identity.update(block.decode(payload))
+        return identity
+
+    async def async_shutdown(self):
+        """Stop polling and give the connection back to the pool."""
+        await super().async_shutdown()
+        if self._unsub_write_flush is not None:
+            self._unsub_write_flush()
+            self._unsub_write_flush = None
+        pending, self._pending_writes = self._pending_writes, {}
+        _fail_writes(pending)
+        for unsub in self._unsub_trailing.values():
+            unsub()
+        self._unsub_trailing.clear()
+        await self._async_stop_capture()
+        await self._scheduler.pool.release(self._client)
+
+    async def async_start_capture(self):
+        """Start recording the traffic of the client, if enabled."""
+        if self._recorder is None:
+            return
+        await self.hass.async_add_executor_job(self._recorder.start)
+        # on a shared gateway this captures the traffic of all its units
+        self._client.client.recorder = self._recorder
+        _LOGGER.info(
+            "Capturing the Modbus traffic of %s to %s", self.name, self._recorder.path
         )
 
-        # 23
-        vzv_kitchenhood_boost_volume_per_run = decoder.decode_16bit_uint()
-        self.data["vzv_kitchenhood_boost_volume_per_run"] = (
-            1 if vzv_kitchenhood_boost_volume_per_run != 0 else 0
+    async def _async_stop_capture(self):
+        """Stop recording and close the capture file."""
+        if self._recorder is None:
+            return
+        if self._client.client.recorder is self._recorder:
+            self._client.client.recorder = None
+        await self.hass.async_add_executor_job(self._recorder.stop)
+
+    async def async_discover_peripherals(self, cached=None):
+        """Find the connected peripherals and make room for their values.
+
+        Only the registers of connected peripherals are added to the map, so
+        absent ones are neither polled nor stored. If the device cannot be
+        reached, the presence values in cached are used instead.
+        """
+        values = {}
+        for block in plan_reads(presence_registers(), self._max_read_gap):
+            payload = await self.async_read_block(block)
+            if payload is None:
+                if not cached:
+                    return False
+                _LOGGER.debug("%s unreachable, using cached peripherals", self.name)
+                values = cached
+                break
+            values.update(block.decode(payload))
+
+        self.peripherals = connected_peripherals(values)
+        for peripheral in self.peripherals:
+            self._register_map.update(
+                (register.key, register) for register in peripheral.registers
+            )
+            self.data.add(register.key for register in peripheral.registers)
+        self._read_plans.clear()
+        self.data.update(
+            {key: value for key, value in values.items() if key in self._register_map}
         )
-
-        # TODO figure this out
-
-        # wall mounted thermostats (3)
-        # 100, 105, 110
-        ui_temp_corr = decoder.decode_16bit_uint()
-        self.data["ui_temp_corr"] = ui_temp_corr
-
-        # wall mounted sensors (8)
-        # 115, 120, 125, 130, 135, 140, 145, 150
-        se_temp_corr = decoder.decode_16bit_uint()
-        self.data["se_temp_corr"] = se_temp_corr
-
-        # alfa temperature correction
-        # 160, 165, 170, 175, 180, 185, 190, 195
-        alfa_temp_corr = decoder.decode_16bit_uint()
-        self.data["alfa_temp_corr"] = alfa_temp_corr
-
-        # alfa ntc temperature sensor correction
-        # 162, 167, 172, 177, 182, 187, 192, 197
-        alfa_ntc_temp_corr = decoder.decode_16bit_uint()
-        self.data["alfa_ntc_temp_corr"] = alfa_ntc_temp_corr
-
-        # EXT SENSORS
-        ext_sensor_reg_count = 8 * 10
-        ext_sensor_data = self.read_holding_registers(
-            unit=1, address=0x12C, count=ext_sensor_reg_count
+        _LOGGER.debug(
+            "%s peripherals: %s",
+            self.name,
+            ", ".join(peripheral.key for peripheral in self.peripherals) or "none",
         )
+        return True
 
-        if ext_sensor_data.isError():
-            return False
-
-        decoder = BinaryPayloadDecoder.fromRegisters(
-            ext_sensor_data.register, byteorder=Endian.Big
-        )
+    async def async_load_snapshot(self):
+        """Load the values saved by the last run, empty if there are none."""
+        stored = await self._store.async_load()
+        if not stored:
+            return {}
+        self.snapshot_time = dt_util.parse_datetime(stored["time"])
+        return stored["data"]
 
-        # 300 - 375
-        sensors: list[dict[int, Any]] = []
-        for i in range(8):
-            sensor_data = {
-                ExtSensorFields.INDEX: i,
-                ExtSensorFields.PRESENT: False,
-                ExtSensorFields.ERROR: 0,
-                ExtSensorFields.TEMPERATURE: 0,
-                ExtSensorFields.HUMIDITY: 0,
-                ExtSensorFields.CO2: 0,
-                ExtSensorFields.FLOOR_TEMP: 0,
-            }
+    @callback
+    def async_restore_snapshot(self, values):
+        """Serve saved values, marked stale, until the first poll."""
+        values = {
+            key: value for key, value in values.items() if key in self._register_map
+        }
+        if values:
+            self.data.update(values)
+            self.stale = True
 
-            # XX0
-            sensor_present = decoder.decode_16bit_uint()
-            sensor_data[ExtSensorFields.PRESENT] = sensor_present != 0
+    @callback
+    def _async_save_snapshot(self):
+        """Save the values at most once per SNAPSHOT_SAVE_INTERVAL."""
+        if self._save_pending:
+            return
+        self._save_pending = True
+        self._store.async_delay_save(self._snapshot, SNAPSHOT_SAVE_INTERVAL)
 
-            # XX1
-            sensor_error = decoder.decode_16bit_uint()
-            sensor_data[ExtSensorFields.ERROR] = sensor_error
+    @callback
+    def _snapshot(self):
+        """Return the values to save along with the time they were read."""
+        self._save_pending = False
+        return {"time": self._last_update.isoformat(), "data": self.data.as_dict()}
 
-            # XX2
-            sensor_temperature = decoder.decode_16bit_int()
-            sensor_data[ExtSensorFields.TEMPERATURE] = round(
-                sensor_temperature * 0.1, 1
+    async def async_read_modbus_data(self, groups=None):
+        """Read data from modbus."""
+        return await self.async_read_modbus_info(groups)
+
+    async def async_write_register(self, address: int, value: int):
+        """Write modbus register.
+
+        Writes issued within WRITE_DEBOUNCE of each other are sent together,
+        contiguous addresses in a single request and the last value per
+        address winning.
+        """
+        future = self.hass.loop.create_future()
+        self._written.add(address)
+        _, futures = self._pending_writes.get(address, (None, []))
+        futures.append(future)
+        self._pending_writes[address] = (value, futures)
+        if self._unsub_write_flush is None:
+            self._unsub_write_flush = async_call_later(
+                self.hass, WRITE_DEBOUNCE, self._async_flush_writes
+            )
+        return await future
+
+    async def _async_flush_writes(self, _now=None):
+        """Send the queued writes."""
+        self._unsub_write_flush = None
+        self._async_cancel_poll_reads()
+        pending, self._pending_writes = self._pending_writes, {}
+        self._flushing.update(pending)
+        try:
+            runs = plan_writes(
+                {address: value for address, (value, _) in pending.items()}
+            )
+            results = await asyncio.gather(
+                *(self._async_write_run(address, values) for address, values in runs)
             )
 
-            # XX3
-            sensor_humidity = decoder.decode_16bit_uint()
-            sensor_data[ExtSensorFields.HUMIDITY] = sensor_humidity
-
-            # XX4
-            sensor_co2 = decoder.decode_16bit_uint()
-            sensor_data[ExtSensorFields.CO2] = sensor_co2
-
-            # XX5
-            sensor_floor_temp = decoder.decode_16bit_int()
-            sensor_data[ExtSensorFields.FLOOR_TEMP] = round(sensor_floor_temp * 0.1, 1)
-
-            decoder.skip_bytes(5 * 2)  # is this correct?
-
-            sensors.append(sensor_data)
-        self.data["sensors"] = sensors
+            for (address, _), confirmed in zip(runs, results):
+                for offset, result in enumerate(confirmed):
+                    for future in pending[address + offset][1]:
+                        if not future.done():
+                            future.set_result(result)
+        finally:
+            # writes the flush did not get to, e.g. when it failed, are not applied
+            _fail_writes(pending)
+            self._flushing.difference_update(pending)
+        self._async_poll_soon()
+
+    async def _async_write_run(self, address, values):
+        """Write contiguous registers and read them back.
+
+        Return for each register whether the device now holds the written
+        value, or for a countdown a value it may have counted down to since.
+        """
+        if len(values) == 1:
+            await self._client.write_single_register(address, values[0])
+        else:
+            await self._client.write_multiple_registers(address, values)
 
-        # EXT BUTTONS
-        ext_sensor_reg_count = 8 * 10
-        ext_sensor_data = self.read_holding_registers(
-            unit=1, address=0x190, count=ext_sensor_reg_count
+        readback = await self._client.read_holding_registers(
+            address, len(values), RequestPriority.READBACK
         )
+        if readback is None:
+            return [False] * len(values)
+
+        values_read = {
+            register.key: register.decode(readback, register.address - address)
+            for register in self._register_map.values()
+            if register.table is RegisterTable.HOLDING
+            and address <= register.address
+            and register.end <= address + len(values)
+        }
+        self.data.update(values_read)
+        self._async_publish_keys(values_read)
+        countdowns = {
+            register.address
+            for register in self._register_map.values()
+            if register.countdown
+            and register.table is RegisterTable.HOLDING
+            and address <= register.address < address + len(values)
+        }
+        return [
+            _confirmed(actual, value, address + offset in countdowns)
+            for offset, (actual, value) in enumerate(zip(readback, values))
+        ]
 
-        if ext_sensor_data.isError():
-            return False
-
-        decoder = BinaryPayloadDecoder.fromRegisters(
-            ext_sensor_data.register, byteorder=Endian.Big
+    async def async_write_data(self, key, value):
+        """Write value to the register behind key.
+
+        The value is published right away and confirmed by reading the
+        register back. If the device did not take it, the entity reverts to
+        the value read back, or to the previous one if none could be read.
+        """
+        register = self._register_map[key]
+        words = register.encode(value)
+        previous = self.data.get(key, _MISSING)
+        optimistic = register.decode(words, 0)
+        self._written.update(range(register.address, register.end))
+        self.data[key] = optimistic
+        self._async_publish_keys((key,))
+
+        results = await asyncio.gather(
+            *(
+                self.async_write_register(register.address + offset, word)
+                for offset, word in enumerate(words)
+            )
         )
-
-        # 400 - 473
-        buttons: list[dict[int, Any]] = []
-        for i in range(8):
-            button_data = {
-                ExtButtonFields.INDEX: i,
-                ExtButtonFields.PRESENT: False,
-                ExtButtonFields.BUTTON_MODE: 0,
-                ExtButtonFields.BUTTON_TIMER: 0,
-                ExtButtonFields.BUTTON_ACTIVE: 0,
-            }
-
-            # XX0
-            button_present = decoder.decode_16bit_uint()
-            button_data[ExtButtonFields.PRESENT] = button_present != 0
-
-            # XX1
-            button_mode = decoder.decode_16bit_uint()
-            button_data[ExtButtonFields.BUTTON_MODE] = button_mode
-
-            # XX2
-            button_tm = decoder.decode_16bit_uint()
-            button_data[ExtButtonFields.BUTTON_TIMER] = button_tm
-
-            # XX3
-            button_active = decoder.decode_16bit_uint()
-            button_data[ExtButtonFields.BUTTON_ACTIVE] = button_active
-
-            decoder.skip_bytes(7 * 2)  # 7 addresses for 16bits
-            buttons.append(button_data)
-        self.data["buttons"] = buttons
-
-        # TODO figure this out also
-        # 900
-        access_code = decoder.decode_16bit_uint()
-        self.data["access_code"] = access_code
-
-        # 920
-        user_password = decoder.decode_16bit_uint()
-        self.data["user_password"] = user_password
-
-        # 922
-        password_timeout = decoder.decode_16bit_uint()
-        self.data["password_timeout"] = password_timeout
-
-        return True
-
-    def read_modbus_input_registers(self):
-        global_reg_count = 24
-        global_data = self.read_holding_registers(
-            unit=1, address=0x0, count=global_reg_count
+        if all(results):
+            return True
+
+        _LOGGER.warning(
+            "Writing %s=%s to %s was not applied: %s",
+            key,
+            value,
+            self.name,
+            self._client.last_error or "device reports a different value",
         )
+        if self.data.get(key) == optimistic:
+            if previous is _MISSING:
+                self.data.pop(key, None)
+            else:
+                self.data[key] = previous
+        self._async_publish_keys((key,))
+        return False
 
-        if global_data.isError():
-            return False
-
-        decoder = BinaryPayloadDecoder.fromRegisters(
-            global_data.register, byteorder=Endian.Big
+    def _registers(self, descriptions=None):
+        """Return the registers the listeners, or descriptions, depend on."""
+        keys = _dependencies(
+            self.async_contexts() if descriptions is None else descriptions
         )
+        return [self._register_map[key] for key in keys if key in self._register_map]
+
+    def read_plan(self, groups=None):
+        """Return the coalesced reads covering the registered keys in groups."""
+        groups = frozenset(RegisterGroup if groups is None else groups)
+        if groups not in self._read_plans:
+            self._read_plans[groups] = plan_reads(
+                (
+                    register
+                    for register in self._registers()
+                    if register.group in groups
+                ),
+                self._max_read_gap,
+            )
+        return self._read_plans[groups]
 
-        # 0
-        fact_device_id = decoder.decode_16bit_uint()
-        self.data["fact_device_id"] = fact_device_id
-
-        # 1-2
-        fact_serial_number = decoder.decode_32bit_uint()
-        self.data["fact_serial_number"] = fact_serial_number
-
-        # 3-5
-        fact_ethernet_mac_1 = decoder.decode_16bit_uint()
-        fact_ethernet_mac_2 = decoder.decode_16bit_uint()
-        fact_ethernet_mac_3 = decoder.decode_16bit_uint()
-        self.data["fact_ethernet_mac"] = [
-            fact_ethernet_mac_1,
-            fact_ethernet_mac_2,
-            fact_ethernet_mac_3,
-        ]
-
-        # 14
-        sys_options = decoder.decode_16bit_uint()
-        if sys_options in DEVICE_MODEL:
-            self.data["sys_options"] = DEVICE_MODEL[sys_options]
+    async def async_read_block(self, block):
+        """Read the registers of one block of the read plan."""
+        if block.table is RegisterTable.HOLDING:
+            function_code = READ_HOLDING_REGISTERS
         else:
-            self.data["sys_options"] = UNKNOWN_MODEL
-
-        # 15
-        fut_config = decoder.decode_16bit_uint()
-        self.data["fut_config"] = fut_config
-
-        # 16-17
-        fut_mode = decoder.decode_32bit_uint()
-        self.data["fut_mode"] = fut_mode
-
-        # 18-19
-        fut_error = decoder.decode_32bit_uint()
-        self.data["fut_error"] = fut_error
-
-        # 20-21
-        fut_warning = decoder.decode_32bit_uint()
-        self.data["fut_warning"] = fut_warning
-
-        decoder.skip_bytes(9 * 2)
-
-        # 30
-        fut_temp_ambient = decoder.decode_16bit_uint()
-        self.data["fut_temp_ambient"] = round(fut_temp_ambient * 0.1, 1)
-
-        # 31
-        fut_temp_fresh = decoder.decode_16bit_uint()
-        self.data["fut_temp_fresh"] = round(fut_temp_fresh * 0.1, 1)
-
-        # 32
-        fut_temp_indoor = decoder.decode_16bit_uint()
-        self.data["fut_temp_indoor"] = round(fut_temp_indoor * 0.1, 1)
-
-        # 33
-        fut_temp_waste = decoder.decode_16bit_uint()
-        self.data["fut_temp_waste"] = round(fut_temp_waste * 0.1, 1)
-
-        # 34
-        fut_humi_ambient = decoder.decode_16bit_uint()
-        self.data["fut_humi_ambient"] = round(fut_humi_ambient * 0.1, 1)
-
-        # 35
-        fut_humi_fresh = decoder.decode_16bit_uint()
-        self.data["fut_humi_fresh"] = round(fut_humi_fresh * 0.1, 1)
-
-        # 36
-        fut_humi_indoor = decoder.decode_16bit_uint()
-        self.data["fut_humi_indoor"] = round(fut_humi_indoor * 0.1, 1)
-
-        # 37
-        fut_humi_waste = decoder.decode_16bit_uint()
-        self.data["fut_humi_waste"] = round(fut_humi_waste * 0.1, 1)
-
-        # 38
-        fut_t_out = decoder.decode_16bit_uint()
-        self.data["fut_t_out"] = round(fut_t_out * 0.1, 1)
-
-        decoder.skip_bytes(2)
-
-        # 40
-        fut_filter_wear_level = decoder.decode_16bit_uint()
-        self.data["fut_filter_wear_level"] = fut_filter_wear_level
-
-        # 41
-        fut_power_consumption = decoder.decode_16bit_uint()
-        self.data["fut_power_consumption"] = fut_power_consumption
-
-        # 42
-        fut_heat_recovery = decoder.decode_16bit_uint()
-        self.data["fut_heat_recovery"] = fut_heat_recovery
-
-        # 43
-        fut_heating_power = decoder.decode_16bit_uint()
-        self.data["fut_heating_power"] = fut_heating_power
-
-        # 44
-        fut_air_flow = decoder.decode_16bit_uint()
-        self.data["fut_air_flow"] = fut_air_flow
-
-        # 45
-        fut_fan_pwm_supply = decoder.decode_16bit_uint()
-        self.data["fut_fan_pwm_supply"] = fut_fan_pwm_supply
-
-        # 46
-        fut_fan_pwm_exhaust = decoder.decode_16bit_uint()
-        self.data["fut_fan_pwm_exhaust"] = fut_fan_pwm_exhaust
-
-        # 47
-        fut_fan_pwm_supply = decoder.decode_16bit_uint()
-        self.data["fut_fan_rpm_supply"] = fut_fan_pwm_supply
-
-        # 48
-        fut_fan_pwm_exhaust = decoder.decode_16bit_uint()
-        self.data["fut_fan_rpm_exhaust"] = fut_fan_pwm_exhaust
-
-        # 49
-        fut_uint1_voltage = decoder.decode_16bit_uint()
-        self.data["fut_uint1_voltage"] = fut_uint1_voltage
-
-        # 50
-        fut_uint2_voltage = decoder.decode_16bit_uint()
-        self.data["fut_uint2_voltage"] = fut_uint2_voltage
-
-        # 51
-        fut_dig_inputs = decoder.decode_16bit_uint()
-        self.data["fut_dig_inputs"] = fut_dig_inputs
-
-        # 52
-        sys_battery_voltage = decoder.decode_16bit_uint()
-        self.data["sys_battery_voltage"] = round(sys_battery_voltage * 0.001, 3)
-
-        decoder.skip_bytes(8 * 2)
-
-        # 60-61
-        mbdev_stat_reads = decoder.decode_32bit_uint()
-        self.data["mbdev_stat_reads"] = mbdev_stat_reads
-
-        # 62-63
-        mbdev_stat_writes = decoder.decode_32bit_uint()
-        self.data["mbdev_stat_writes"] = mbdev_stat_writes
-
-        # 64-65
-        mbdev_stat_fails = decoder.decode_32bit_uint()
-        self.data["mbdev_stat_fails"] = mbdev_stat_fails
-
-        # 66
-        mbdev_connected_mk_ui = decoder.decode_16bit_uint()
-        self.data["mbdev_connected_mk_ui"] = mbdev_connected_mk_ui
-
-        # 67-68
-        mbdev_connected_mk_sens = decoder.decode_32bit_uint()
-        self.data["mbdev_connected_mk_sens"] = mbdev_connected_mk_sens
-
-        # 69
-        mbdev_connected_coolbreeze = decoder.decode_16bit_uint()
-        self.data["mbdev_connected_coolbreeze"] = mbdev_connected_coolbreeze != 0
-
-        # 70-71
-        mbdev_connected_valve_supply = decoder.decode_32bit_uint()
-        self.data["mbdev_connected_valve_supply"] = mbdev_connected_valve_supply
-
-        # 72-73
-        mbdev_connected_valve_exhaust = decoder.decode_32bit_uint()
-        self.data["mbdev_connected_valve_exhaust"] = mbdev_connected_valve_exhaust
-
-        # 74
-        mbdev_connected_button = decoder.decode_16bit_uint()
-        self.data["mbdev_connected_button"] = mbdev_connected_button
-
-        # 75
-        mbdev_connected_alfa = decoder.decode_16bit_uint()
-        self.data["mbdev_connected_alfa"] = mbdev_connected_alfa
-
-        decoder.skip_bytes(5 * 2)
-
-        # 80
-        vzv_identity = decoder.decode_16bit_uint()
-        self.data["vzv_identity"] = vzv_identity
-
-        decoder.skip_bytes(20 * 2)
-
-        # 100/.../104 -> ... 114
-        # wall mounted ui
-        uis: list[dict[int, Any]] = []
-        for i in range(3):
-            ui_data = {
-                UIFields.INDEX: i,
-                UIFields.ADDRESS: 0,
-                UIFields.OPTIONS: 0,
-                UIFields.CO2: 0,
-                UIFields.TEMP: 0,
-                UIFields.HUMI: 0,
-            }
-
-            ui_mb_address = decoder.decode_16bit_uint()
-            ui_data[UIFields.ADDRESS] = ui_mb_address
-
-            ui_options = decoder.decode_16bit_uint()
-            ui_data[UIFields.OPTIONS] = ui_options
-
-            ui_co2 = decoder.decode_16bit_uint()
-            ui_data[UIFields.CO2] = ui_co2
-
-            ui_temp = decoder.decode_16bit_uint()
-            ui_data[UIFields.TEMP] = round(ui_temp * 0.1, 1)
-
-            ui_humi = decoder.decode_16bit_uint()
-            ui_data[UIFields.HUMI] = round(ui_humi * 0.1, 1)
-
-            uis.append(ui_data)
-        self.data["ui"] = uis
-
-        # 115/.../119 ... 154
-        sens: list[dict[int, Any]] = []
-        for i in range(8):
-            sens_data = {
-                SensorFields.INDEX: i,
-                SensorFields.ADDRESS: 0,
-                SensorFields.OPTIONS: 0,
-                SensorFields.CO2: 0,
-                SensorFields.TEMP: 0,
-                SensorFields.HUMI: 0,
-            }
-            sens_mb_address = decoder.decode_16bit_uint()
-            sens_data[SensorFields.ADDRESS] = sens_mb_address
-
-            sens_options = decoder.decode_16bit_uint()
-            sens_data[SensorFields.OPTIONS] = sens_options
-
-            sens_co2 = decoder.decode_16bit_uint()
-            sens_data[SensorFields.CO2] = sens_co2
-
-            sens_temp = decoder.decode_16bit_uint()
-            sens_data[SensorFields.TEMP] = round(sens_temp * 0.1, 1)
-
-            sens_humi = decoder.decode_16bit_uint()
-            sens_data[SensorFields.HUMI] = round(sens_humi * 0.1, 1)
-
-            sens.append(sens_data)
-        self.data["sensor"] = sens
+            function_code = READ_INPUT_REGISTERS
+        return await self._client.read_registers_raw(
+            function_code, block.address, block.count
+        )
 
-        decoder.skip_bytes(6 * 2)
+    async def async_read_modbus_info(self, groups=None):
+        """Read the modbus registers of groups, all of them by default.
 
-        # 160/.../165 ... 235
-        alfas: list[dict[int, Any]] = []
-        for i in range(8):
-            alfa_data = {
-                AlfaFields.INDEX: i,
-                AlfaFields.ADDRESS: 0,
-                AlfaFields.OPTIONS: 0,
-                AlfaFields.CO2: 0,
-                AlfaFields.TEMP: 0,
-                AlfaFields.HUMI: 0,
-                AlfaFields.NTC_TEMP: 0,
+        Reads still waiting for a slot when a write comes in are dropped, as
+        their values would be stale; reads already sent complete.
+        """
+        values, failed, _ = await self._async_read_plan(
+            self.read_plan(groups)
+        )
+        self.data.update(values)
+        return not failed
+
+    async def _async_read_plan(self, plan):
+        """Read the blocks of plan.
+
+        Return their values, the number of reads that failed and the number
+        dropped for a write. Values of registers written while the reads
+        were under way are left out, as the read-back of the write has
+        the newer ones.
+        """
+        if not plan:
+            return {}, 0, 0
+        self._written = set(self._pending_writes) | self._flushing
+        # the client pipelines these up to its in-flight window
+        self._poll_reads = [
+            self.hass.async_create_task(self.async_read_block(block))
+            for block in plan
+        ]
+        try:
+            await asyncio.wait(self._poll_reads)
+        finally:
+            reads, self._poll_reads = self._poll_reads, []
+
+        failed = skipped = 0
+        values = {}
+        for block, read in zip(plan, reads):
+            if read.cancelled():
+                skipped += 1
+                continue
+            payload = read.result()
+            if payload is None:
+                failed += 1
+            else:
+                values.update(block.decode(payload))
+        if self._written:
+            values = {
+                key: value
+                for key, value in values.items()
+                if not self._is_written(self._register_map[key])
             }
+        return values, failed, skipped
 
-            alfa_mb_address = decoder.decode_16bit_uint()
-            alfa_data[AlfaFields.INDEX] = alfa_mb_address
-
-            alfa_options = decoder.decode_16bit_uint()
-            alfa_data[AlfaFields.OPTIONS] = alfa_options
-
-            alfa_co2 = decoder.decode_16bit_uint()
-            alfa_data[AlfaFields.CO2] = alfa_co2
-
-            alfa_temp = decoder.decode_16bit_uint()
-            alfa_data[AlfaFields.TEMP] = round(alfa_temp * 0.1, 1)
-
-            alfa_humi = decoder.decode_16bit_uint()
-            alfa_data[AlfaFields.HUMI] = round(alfa_humi * 0.1, 1)
-
-            alfa_ntc_temp = decoder.decode_16bit_uint()
-            alfa_data[AlfaFields.NTC_TEMP] = round(alfa_ntc_temp * 0.1, 1)
-
-            alfas.append(sens_data)
+    def _is_written(self, register):
+        """Return True if register was written since the poll cycle started."""
+        return register.table is RegisterTable.HOLDING and not self._written.isdisjoint(
+            range(register.address, register.end)
+        )
 
-            decoder.skip_bytes(5 * 2)
-        self.data["alfa"] = alfas"""
+    @callback
+    def _async_cancel_poll_reads(self):
+        """Drop the reads of the running poll cycle still waiting for a slot."""
+        self._client.cancel_queued(self._poll_reads)
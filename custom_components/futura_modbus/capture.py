@@ -0,0 +1,178 @@
+"""Capture of Modbus traffic and replay of captures."""
+import asyncio
+from collections import deque
+import json
+import logging
+from logging.handlers import QueueListener, RotatingFileHandler
+import os
+import queue
+import time
+from typing import Iterable, Optional
+
+from .modbus import (
+    DEFAULT_PIPELINE_DEPTH,
+    DEFAULT_TIMEOUT,
+    DEFAULT_UNIT_ID,
+    FuturaModbusClient,
+)
+
+DEFAULT_CAPTURE_MAX_BYTES = 10 * 1024 * 1024
+DEFAULT_CAPTURE_BACKUP_COUNT = 3
+
+
+class TrafficRecorder:
+    """Writes the transactions of a client to a rotating JSONL file.
+
+    Each line holds one transaction: the monotonic time it was sent, the
+    unit id, the request and response PDUs in hex, the round trip time and,
+    for failed ones, the error. The file is rotated once it reaches
+    max_bytes, keeping backup_count older files next to it.
+
+    Lines are queued on the event loop and written by a thread, so a slow
+    disk never holds up a poll.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int = DEFAULT_CAPTURE_MAX_BYTES,
+        backup_count: int = DEFAULT_CAPTURE_BACKUP_COUNT,
+    ):
+        """Initialize the recorder."""
+        self.path = path
+        self._max_bytes = max_bytes
+        self._backup_count = backup_count
+        self._queue = queue.SimpleQueue()
+        self._listener: Optional[QueueListener] = None
+
+    def start(self) -> None:
+        """Open the file and start writing, blocking."""
+        if self._listener is not None:
+            return
+        handler = RotatingFileHandler(
+            self.path,
+            maxBytes=self._max_bytes,
+            backupCount=self._backup_count,
+            encoding="utf-8",
+        )
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        self._listener = QueueListener(self._queue, handler)
+        self._listener.start()
+
+    def stop(self) -> None:
+        """Write out the queued lines and close the file, blocking."""
+        listener, self._listener = self._listener, None
+        if listener is None:
+            return
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
+
+    def record(
+        self,
+        unit_id: int,
+        request: bytes,
+        response: Optional[bytes],
+        sent: float,
+        rtt: float,
+        error: Optional[str] = None,
+    ) -> None:
+        """Queue one transaction for writing."""
+        if self._listener is None:
+            return
+        entry = {
+            "t": round(sent, 6),
+            "unit": unit_id,
+            "request": request.hex(),
+            "response": None if response is None else bytes(response).hex(),
+            "rtt": round(rtt, 6),
+        }
+        if error is not None:
+            entry["error"] = error
+        self._queue.put_nowait(
+            logging.makeLogRecord({"msg": json.dumps(entry, separators=(",", ":"))})
+        )
+
+
+def capture_files(path: str) -> list[str]:
+    """Return path and its rotated backups, oldest first."""
+    files = [path]
+    index = 1
+    while os.path.exists(f"{path}.{index}"):
+        files.append(f"{path}.{index}")
+        index += 1
+    return [file for file in reversed(files) if os.path.exists(file)]
+
+
+def load_capture(path: str) -> list[dict]:
+    """Read the transactions of a capture and its backups in time order."""
+    entries = []
+    for file in capture_files(path):
+        with open(file, encoding="utf-8") as capture:
+            entries.extend(json.loads(line) for line in capture if line.strip())
+    return entries
+
+
+class FuturaReplayClient(FuturaModbusClient):
+    """Client answering from a capture instead of a device.
+
+    Each request is answered with the next recorded response to the same
+    request of the same unit, cycling through them, after the recorded round
+    trip time divided by speed; speed 0 answers at once. Recorded failures
+    are replayed as the same failures. Everything above the wire, such as the
+    request queue, pipelining and metrics, is the regular client.
+    """
+
+    def __init__(
+        self,
+        capture: Iterable[dict],
+        host: str = "replay",
+        port: int = 0,
+        unit_id: int = DEFAULT_UNIT_ID,
+        timeout: float = DEFAULT_TIMEOUT,
+        pipeline_depth: int = DEFAULT_PIPELINE_DEPTH,
+        limiter: Optional[asyncio.Semaphore] = None,
+        *,
+        speed: float = 1.0,
+    ):
+        """Initialize the client."""
+        super().__init__(host, port, unit_id, timeout, pipeline_depth, limiter)
+        self._speed = speed
+        self._open = False
+        self._responses: dict[tuple[int, bytes], deque] = {}
+        for entry in capture:
+            key = (entry["unit"], bytes.fromhex(entry["request"]))
+            self._responses.setdefault(key, deque()).append(entry)
+
+    @property
+    def is_open(self) -> bool:
+        """Return True between open and close."""
+        return self._open
+
+    async def open(self) -> bool:
+        """Start answering; the circuit is ignored to replay every request."""
+        if not self._open:
+            self._open = True
+            self.metrics.connects += 1
+        return True
+
+    async def close(self) -> None:
+        """Stop answering until the next open."""
+        self._open = False
+
+    async def _send(self, pdu: bytes, unit_id: int) -> bytes:
+        """Return the recorded response to pdu after the recorded delay."""
+        entries = self._responses.get((unit_id, bytes(pdu)))
+        if not entries:
+            raise ConnectionError(f"FC{pdu[0]} request {pdu.hex()} not captured")
+        entry = entries[0]
+        entries.rotate(-1)
+        if self._speed:
+            await asyncio.sleep(entry["rtt"] / self._speed)
+        error = entry.get("error")
+        if error is not None:
+            if error.startswith("TimeoutError"):
+                raise asyncio.TimeoutError
+            raise ConnectionError(error)
+        self._last_frame = time.perf_counter()
+        return bytes.fromhex(entry["response"])
@@ -1,5 +1,25 @@
 """Config flow for Futura."""
-from .const import DEFAULT_NAME, DEFAULT_PORT, DEFAULT_SCAN_INTERVAL, DOMAIN
+from .const import (
+    CONF_ADAPTIVE_POLLING,
+    CONF_CAPTURE,
+    CONF_FORCE_UPDATE_INTERVAL,
+    CONF_MAX_READ_GAP,
+    CONF_MAX_SCAN_INTERVAL,
+    CONF_MIN_SCAN_INTERVAL,
+    CONF_PIPELINE_DEPTH,
+    CONF_UNIT_ID,
+    DEFAULT_ADAPTIVE_POLLING,
+    DEFAULT_CAPTURE,
+    DEFAULT_FORCE_UPDATE_INTERVAL,
+    DEFAULT_MAX_SCAN_INTERVAL,
+    DEFAULT_MIN_SCAN_INTERVAL,
+    DEFAULT_NAME,
+    DEFAULT_PORT,
+    DEFAULT_SCAN_INTERVAL,
+    DOMAIN,
+)
+from .modbus import DEFAULT_PIPELINE_DEPTH, DEFAULT_UNIT_ID
+from .registers import DEFAULT_MAX_READ_GAP
 
 import logging
 import ipaddress
@@ -12,13 +32,36 @@ from homeassistant.core import HomeAssistant, callback
 
 _LOGGER = logging.getLogger(__name__)
 
+# at least 1, a scan interval of 0 would poll the device in a tight loop
+POSITIVE_INT = vol.All(int, vol.Range(min=1))
+NON_NEGATIVE_INT = vol.All(int, vol.Range(min=0))
+# the unit id is a single byte of the MBAP header
+UNIT_ID = vol.All(int, vol.Range(min=0, max=255))
 
 DATA_SCHEMA = vol.Schema(
     {
         vol.Optional(CONF_NAME, default=DEFAULT_NAME): str,
         vol.Required(CONF_HOST): str,
         vol.Required(CONF_PORT, default=DEFAULT_PORT): int,
-        vol.Optional(CONF_SCAN_INTERVAL, default=DEFAULT_SCAN_INTERVAL): int,
+        vol.Optional(CONF_UNIT_ID, default=DEFAULT_UNIT_ID): UNIT_ID,
+        vol.Optional(CONF_SCAN_INTERVAL, default=DEFAULT_SCAN_INTERVAL): POSITIVE_INT,
+        vol.Optional(
+            CONF_MAX_READ_GAP, default=DEFAULT_MAX_READ_GAP
+        ): NON_NEGATIVE_INT,
+        vol.Optional(
+            CONF_PIPELINE_DEPTH, default=DEFAULT_PIPELINE_DEPTH
+        ): POSITIVE_INT,
+        vol.Optional(
+            CONF_FORCE_UPDATE_INTERVAL, default=DEFAULT_FORCE_UPDATE_INTERVAL
+        ): NON_NEGATIVE_INT,
+        vol.Optional(CONF_ADAPTIVE_POLLING, default=DEFAULT_ADAPTIVE_POLLING): bool,
+        vol.Optional(
+            CONF_MIN_SCAN_INTERVAL, default=DEFAULT_MIN_SCAN_INTERVAL
+        ): POSITIVE_INT,
+        vol.Optional(
+            CONF_MAX_SCAN_INTERVAL, default=DEFAULT_MAX_SCAN_INTERVAL
+        ): POSITIVE_INT,
+        vol.Optional(CONF_CAPTURE, default=DEFAULT_CAPTURE): bool,
     }
 )
 
@@ -65,6 +108,11 @@ class FuturaModbusConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 errors[CONF_NAME] = "already_configured"
             elif not host_valid(host):
                 errors[CONF_HOST] = "invalid host IP"
+            elif (
+                user_input[CONF_MIN_SCAN_INTERVAL]
+                > user_input[CONF_MAX_SCAN_INTERVAL]
+            ):
+                errors[CONF_MIN_SCAN_INTERVAL] = "min_above_max"
             else:
                 await self.async_set_unique_id(name + "_MB")  # something_modbus
                 self._abort_if_unique_id_configured()
@@ -87,9 +135,30 @@ class FuturaModbusConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                     ): str,
                     vol.Required(CONF_HOST, default=user_input.get(CONF_HOST)): str,
                     vol.Required(CONF_PORT, default=DEFAULT_PORT): int,
+                    vol.Optional(CONF_UNIT_ID, default=DEFAULT_UNIT_ID): UNIT_ID,
                     vol.Optional(
                         CONF_SCAN_INTERVAL, default=DEFAULT_SCAN_INTERVAL
-                    ): int,
+                    ): POSITIVE_INT,
+                    vol.Optional(
+                        CONF_MAX_READ_GAP, default=DEFAULT_MAX_READ_GAP
+                    ): NON_NEGATIVE_INT,
+                    vol.Optional(
+                        CONF_PIPELINE_DEPTH, default=DEFAULT_PIPELINE_DEPTH
+                    ): POSITIVE_INT,
+                    vol.Optional(
+                        CONF_FORCE_UPDATE_INTERVAL,
+                        default=DEFAULT_FORCE_UPDATE_INTERVAL,
+                    ): NON_NEGATIVE_INT,
+                    vol.Optional(
+                        CONF_ADAPTIVE_POLLING, default=DEFAULT_ADAPTIVE_POLLING
+                    ): bool,
+                    vol.Optional(
+                        CONF_MIN_SCAN_INTERVAL, default=DEFAULT_MIN_SCAN_INTERVAL
+                    ): POSITIVE_INT,
+                    vol.Optional(
+                        CONF_MAX_SCAN_INTERVAL, default=DEFAULT_MAX_SCAN_INTERVAL
+                    ): POSITIVE_INT,
+                    vol.Optional(CONF_CAPTURE, default=DEFAULT_CAPTURE): bool,
                 }
             ),
             errors=errors,
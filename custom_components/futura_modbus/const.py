@@ -1,86 +1,79 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 
-from enum import Enum, auto
-from typing import Optional
+from typing import Any, Callable, Optional
 
-from homeassistant.components.sensor import SensorEntityDescription, SensorDeviceClass
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntityDescription,
+    SensorStateClass,
+)
 from homeassistant.components.number import NumberEntityDescription
 from homeassistant.components.switch import SwitchEntityDescription, SwitchDeviceClass
 from homeassistant.const import (
+    CONCENTRATION_PARTS_PER_MILLION,
+    EntityCategory,
     UnitOfTemperature,
     UnitOfPower,
     UnitOfTime,
     PERCENTAGE,
 )
 
+from .registers import PeripheralType
+
 DOMAIN = "futura_modbus"
 DEFAULT_NAME = "FuturaModbus"
 DEFAULT_PORT = 502
 DEFAULT_SCAN_INTERVAL = 2
+NORMAL_SCAN_INTERVAL = 10
+SLOW_SCAN_INTERVAL = 300
+# seconds to collect writes before sending them together
+WRITE_DEBOUNCE = 0.05
+# seconds during which refresh requests are collected into one poll
+REFRESH_COOLDOWN = 1
+DEFAULT_FORCE_UPDATE_INTERVAL = 0
+DEFAULT_ADAPTIVE_POLLING = False
+DEFAULT_MIN_SCAN_INTERVAL = 1
+DEFAULT_MAX_SCAN_INTERVAL = 60
+DEFAULT_CAPTURE = False
+
+CONF_MAX_READ_GAP = "max_read_gap"
+CONF_PIPELINE_DEPTH = "pipeline_depth"
+CONF_FORCE_UPDATE_INTERVAL = "force_update_interval"
+CONF_ADAPTIVE_POLLING = "adaptive_polling"
+CONF_MIN_SCAN_INTERVAL = "min_scan_interval"
+CONF_MAX_SCAN_INTERVAL = "max_scan_interval"
+CONF_UNIT_ID = "unit_id"
+# record the Modbus traffic to a rotating file in the config directory
+CONF_CAPTURE = "capture"
+# static identity registers cached in the config entry
+CONF_IDENTITY = "identity"
+
+STORAGE_VERSION = 1
+# seconds between saves of the snapshot restored on startup
+SNAPSHOT_SAVE_INTERVAL = 60
+ATTR_RESTORED_AT = "restored_at"
+
+DATA_SCHEDULER = f"{DOMAIN}_scheduler"
+# Modbus requests in flight across all hubs
+MAX_CONCURRENT_REQUESTS = 8
 
 DEVICE_ID = 39
 
 
-class UIFields(Enum):
-    """Fields for wall mounted UI displays."""
-
-    INDEX = auto()
-    ADDRESS = auto()  # modbus address
-    OPTIONS = auto()
-    CO2 = auto()
-    TEMP = auto()
-    HUMI = auto()
-
-
-class SensorFields(Enum):
-    """Fields for internal sensors."""
-
-    INDEX = auto()
-    ADDRESS = auto()  # modbus address
-    OPTIONS = auto()
-    CO2 = auto()
-    TEMP = auto()
-    HUMI = auto()
-
-
-class AlfaFields(Enum):
-    """Fields for Alfa."""
-
-    INDEX = auto()
-    ADDRESS = auto()  # modbus address
-    OPTIONS = auto()
-    CO2 = auto()
-    TEMP = auto()
-    HUMI = auto()
-    NTC_TEMP = auto()
-
-
-class ExtSensorFields(Enum):
-    """Fields for external sensors."""
-
-    INDEX = auto()
-    PRESENT = auto()
-    ERROR = auto()
-    TEMPERATURE = auto()
-    HUMIDITY = auto()
-    CO2 = auto()
-    FLOOR_TEMP = auto()
-
-
-class ExtButtonFields(Enum):
-    """Button Fields for external buttons"""
-
-    INDEX = auto()
-    PRESENT = auto()
-    BUTTON_MODE = auto()
-    BUTTON_TIMER = auto()
-    BUTTON_ACTIVE = auto()
-
-
 @dataclass
 class FuturaModbusSensorEntityDescription(SensorEntityDescription):
     """Class that describes Futura sensor entities"""
 
+    # registers the entity reads besides the one behind key, polled only
+    # while the entity is enabled
+    registers: tuple[str, ...] = ()
+    # changes up to deadband (absolute) or deadband_percent (of the last
+    # published value) are not published, nor are changes arriving within
+    # min_publish_interval seconds of the last publish
+    deadband: Optional[float] = None
+    deadband_percent: Optional[float] = None
+    min_publish_interval: Optional[float] = None
+
 
 SENSOR_TYPES: dict[str, list[FuturaModbusSensorEntityDescription]] = {
     "temp_ambient": FuturaModbusSensorEntityDescription(
@@ -88,48 +81,56 @@ SENSOR_TYPES: dict[str, list[FuturaModbusSensorEntityDescription]] = {
         key="fut_temp_ambient",
         native_unit_of_measurement=UnitOfTemperature.CELSIUS,
         device_class=SensorDeviceClass.TEMPERATURE,  # DEVICE_CLASS_TEMPERATURE,
+        deadband=0.1,
     ),
     "temp_fresh": FuturaModbusSensorEntityDescription(
         name="Fresh temperature",
         key="fut_temp_fresh",
         native_unit_of_measurement=UnitOfTemperature.CELSIUS,
         device_class=SensorDeviceClass.TEMPERATURE,
+        deadband=0.1,
     ),
     "temp_indoor": FuturaModbusSensorEntityDescription(
         name="Indoor temperature",
         key="fut_temp_indoor",
         native_unit_of_measurement=UnitOfTemperature.CELSIUS,
         device_class=SensorDeviceClass.TEMPERATURE,
+        deadband=0.1,
     ),
     "temp_waste": FuturaModbusSensorEntityDescription(
         name="Waste temperature",
         key="fut_temp_waste",
         native_unit_of_measurement=UnitOfTemperature.CELSIUS,
         device_class=SensorDeviceClass.TEMPERATURE,
+        deadband=0.1,
     ),
     "humi_ambient": FuturaModbusSensorEntityDescription(
         name="Ambient humidity",
         key="fut_humi_ambient",
         native_unit_of_measurement=PERCENTAGE,
         device_class=SensorDeviceClass.HUMIDITY,
+        deadband=0.5,
     ),
     "humi_fresh": FuturaModbusSensorEntityDescription(
         name="Fresh humidity",
         key="fut_humi_fresh",
         native_unit_of_measurement=PERCENTAGE,
         device_class=SensorDeviceClass.HUMIDITY,
+        deadband=0.5,
     ),
     "humi_indoor": FuturaModbusSensorEntityDescription(
         name="Indoor humidity",
         key="fut_humi_indoor",
         native_unit_of_measurement=PERCENTAGE,
         device_class=SensorDeviceClass.HUMIDITY,
+        deadband=0.5,
     ),
     "humi_waste": FuturaModbusSensorEntityDescription(
         name="Waste humidity",
         key="fut_humi_waste",
         native_unit_of_measurement=PERCENTAGE,
         device_class=SensorDeviceClass.HUMIDITY,
+        deadband=0.5,
     ),
     "device_consumption": FuturaModbusSensorEntityDescription(
         name="Device consumption",
@@ -149,14 +150,220 @@ SENSOR_TYPES: dict[str, list[FuturaModbusSensorEntityDescription]] = {
         native_unit_of_measurement=UnitOfPower.WATT,
         device_class=SensorDeviceClass.POWER,
     ),
+    # request counters kept by the unit itself
+    "device_reads": FuturaModbusSensorEntityDescription(
+        name="Modbus reads",
+        key="mbdev_stat_reads",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+    ),
+    "device_writes": FuturaModbusSensorEntityDescription(
+        name="Modbus writes",
+        key="mbdev_stat_writes",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+    ),
+    "device_fails": FuturaModbusSensorEntityDescription(
+        name="Modbus failures",
+        key="mbdev_stat_fails",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+    ),
 }
 
 
+@dataclass
+class FuturaModbusMetricSensorEntityDescription(SensorEntityDescription):
+    """Class that describes sensors of the hub's own request metrics"""
+
+    value_fn: Callable[[Any], Any] = None
+
+
+def _ms(seconds):
+    return None if seconds is None else round(seconds * 1000, 1)
+
+
+def _duration(name, key, value_fn):
+    return FuturaModbusMetricSensorEntityDescription(
+        name=name,
+        key=key,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        value_fn=value_fn,
+    )
+
+
+def _counter(name, key, value_fn):
+    return FuturaModbusMetricSensorEntityDescription(
+        name=name,
+        key=key,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        value_fn=value_fn,
+    )
+
+
+METRIC_SENSOR_TYPES: dict[str, FuturaModbusMetricSensorEntityDescription] = {
+    "poll_cycle_time": _duration(
+        "Poll cycle time",
+        "metric_poll_cycle_time",
+        lambda hub: _ms(hub.cycle_time.last),
+    ),
+    "failed_polls": _counter(
+        "Failed polls", "metric_failed_polls", lambda hub: hub.failed_cycles
+    ),
+    "request_rtt": _duration(
+        "Request round trip",
+        "metric_request_rtt",
+        lambda hub: _ms(hub.client_metrics.rtt.mean),
+    ),
+    "queue_wait": _duration(
+        "Request queue wait",
+        "metric_queue_wait",
+        lambda hub: _ms(hub.client_metrics.queue_wait.mean),
+    ),
+    "limiter_wait": _duration(
+        "Request limiter wait",
+        "metric_limiter_wait",
+        lambda hub: _ms(hub.client_metrics.limiter_wait.mean),
+    ),
+    "request_timeouts": _counter(
+        "Request timeouts",
+        "metric_request_timeouts",
+        lambda hub: hub.client_metrics.timeouts,
+    ),
+    "request_retries": _counter(
+        "Request retries",
+        "metric_request_retries",
+        lambda hub: hub.client_metrics.retries,
+    ),
+    "reconnects": _counter(
+        "Reconnects", "metric_reconnects", lambda hub: hub.client_metrics.reconnects
+    ),
+}
+
+
+PERIPHERAL_NAMES: dict[PeripheralType, str] = {
+    PeripheralType.UI: "Wall UI",
+    PeripheralType.SENSOR: "Wall sensor",
+    PeripheralType.ALFA: "Alfa",
+    PeripheralType.EXT_SENSOR: "External sensor",
+    PeripheralType.BUTTON: "Button",
+}
+
+_ROOM_SENSOR_TYPES = (
+    FuturaModbusSensorEntityDescription(
+        name="CO2",
+        key="co2",
+        native_unit_of_measurement=CONCENTRATION_PARTS_PER_MILLION,
+        device_class=SensorDeviceClass.CO2,
+        deadband=10,
+    ),
+    FuturaModbusSensorEntityDescription(
+        name="temperature",
+        key="temp",
+        native_unit_of_measurement=UnitOfTemperature.CELSIUS,
+        device_class=SensorDeviceClass.TEMPERATURE,
+        deadband=0.1,
+    ),
+    FuturaModbusSensorEntityDescription(
+        name="humidity",
+        key="humi",
+        native_unit_of_measurement=PERCENTAGE,
+        device_class=SensorDeviceClass.HUMIDITY,
+        deadband=0.5,
+    ),
+)
+
+# keys and registers are peripheral field names, prefixed per unit at setup
+PERIPHERAL_SENSOR_TYPES: dict[
+    PeripheralType, tuple[FuturaModbusSensorEntityDescription, ...]
+] = {
+    PeripheralType.UI: _ROOM_SENSOR_TYPES,
+    PeripheralType.SENSOR: _ROOM_SENSOR_TYPES,
+    PeripheralType.ALFA: _ROOM_SENSOR_TYPES
+    + (
+        FuturaModbusSensorEntityDescription(
+            name="NTC temperature",
+            key="ntc_temp",
+            native_unit_of_measurement=UnitOfTemperature.CELSIUS,
+            device_class=SensorDeviceClass.TEMPERATURE,
+            deadband=0.1,
+        ),
+    ),
+    PeripheralType.EXT_SENSOR: (
+        FuturaModbusSensorEntityDescription(
+            name="temperature",
+            key="temperature",
+            native_unit_of_measurement=UnitOfTemperature.CELSIUS,
+            device_class=SensorDeviceClass.TEMPERATURE,
+            deadband=0.1,
+        ),
+        FuturaModbusSensorEntityDescription(
+            name="humidity",
+            key="humidity",
+            native_unit_of_measurement=PERCENTAGE,
+            device_class=SensorDeviceClass.HUMIDITY,
+            deadband=0.5,
+        ),
+        FuturaModbusSensorEntityDescription(
+            name="CO2",
+            key="co2",
+            native_unit_of_measurement=CONCENTRATION_PARTS_PER_MILLION,
+            device_class=SensorDeviceClass.CO2,
+            deadband=10,
+        ),
+        FuturaModbusSensorEntityDescription(
+            name="floor temperature",
+            key="floor_temp",
+            native_unit_of_measurement=UnitOfTemperature.CELSIUS,
+            device_class=SensorDeviceClass.TEMPERATURE,
+            deadband=0.1,
+        ),
+    ),
+    PeripheralType.BUTTON: (
+        FuturaModbusSensorEntityDescription(
+            name="active",
+            key="active",
+            icon="mdi:gesture-tap-button",
+        ),
+    ),
+}
+
+
+def peripheral_name(peripheral) -> str:
+    """Return the display name of a peripheral, e.g. "Wall sensor 3"."""
+    return f"{PERIPHERAL_NAMES[peripheral.type]} {peripheral.index + 1}"
+
+
+def peripheral_sensor_descriptions(peripheral):
+    """Return the sensor descriptions of a connected peripheral."""
+    name = peripheral_name(peripheral)
+    return [
+        replace(
+            template,
+            key=f"{peripheral.key}_{template.key}",
+            name=f"{name} {template.name}",
+            registers=tuple(
+                f"{peripheral.key}_{field}" for field in template.registers
+            ),
+        )
+        for template in PERIPHERAL_SENSOR_TYPES[peripheral.type]
+    ]
+
+
 @dataclass
 class FuturaModbusNumberEntityDescription(NumberEntityDescription):
     """Class that describes Futura number entities"""
 
-    address: Optional[int] = None
+    registers: tuple[str, ...] = ()
 
 
 NUMBER_TYPES: dict[str, list[FuturaModbusNumberEntityDescription]] = {
@@ -169,7 +376,6 @@ NUMBER_TYPES: dict[str, list[FuturaModbusNumberEntityDescription]] = {
         native_min_value=0,
         native_max_value=10,
         icon="mdi:fan",
-        address=1,
     ),
 }
 
@@ -178,7 +384,7 @@ NUMBER_TYPES: dict[str, list[FuturaModbusNumberEntityDescription]] = {
 class FuturaModbusSwitchEntityDescription(SwitchEntityDescription):
     """Class that describes Futura switch entities"""
 
-    address: Optional[int] = None
+    registers: tuple[str, ...] = ()
 
 
 SWITCH_TYPES: dict[str, list[FuturaModbusSwitchEntityDescription]] = {
@@ -187,21 +393,18 @@ SWITCH_TYPES: dict[str, list[FuturaModbusSwitchEntityDescription]] = {
         key="cfg_bypass_enable",
         device_class=SwitchDeviceClass.SWITCH,
         icon="mdi:transit-skip",
-        address=14,
     ),
     "heating": FuturaModbusSwitchEntityDescription(
         name="Enable heating",
         key="cfg_heating_enable",
         device_class=SwitchDeviceClass.SWITCH,
         icon="mdi:heat-wave",
-        address=15,
     ),
     "cooling": FuturaModbusSwitchEntityDescription(
         name="Enable cooling",
         key="cfg_cooling_enable",
         device_class=SwitchDeviceClass.SWITCH,
         icon="mdi:snowflake",
-        address=16,
     ),
 }
 
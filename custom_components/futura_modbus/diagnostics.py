@@ -0,0 +1,29 @@
+"""Diagnostics support for Futura Modbus."""
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_HOST, CONF_NAME
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN
+
+TO_REDACT = {
+    CONF_HOST,
+    "fact_serial_number",
+    "fact_ethernet_mac_1",
+    "fact_ethernet_mac_2",
+    "fact_ethernet_mac_3",
+}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+):
+    """Return diagnostics of a config entry."""
+    hub = hass.data[DOMAIN][entry.data[CONF_NAME]]["hub"]
+    return {
+        "entry": {
+            "data": async_redact_data(entry.data, TO_REDACT),
+            "options": async_redact_data(entry.options, TO_REDACT),
+        },
+        "hub": await hub.async_diagnostics(),
+    }
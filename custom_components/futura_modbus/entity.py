@@ -0,0 +1,69 @@
+"""Base entity of the Futura Modbus platforms."""
+import time
+from typing import Optional
+
+from homeassistant.core import callback
+from homeassistant.helpers.entity import EntityDescription
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+from .const import ATTR_RESTORED_AT
+
+
+class FuturaModbusEntity(CoordinatorEntity):
+    """Entity showing the value of one register of the hub.
+
+    The description is the listener context, so the hub polls the register
+    behind its key while the entity is enabled. Updates within the deadbands
+    of the description are not written to the state machine.
+    """
+
+    def __init__(
+        self,
+        platform_name,
+        hub,
+        device_info,
+        description: EntityDescription,
+    ):
+        """Initialize the entity."""
+        super().__init__(hub, context=description)
+        self._platform_name = platform_name
+        self._attr_device_info = device_info
+        self._hub = hub
+        self._index = hub.data.index(description.key)
+        self._published = None
+        self.entity_description = description
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write the state if the value changed enough to publish."""
+        value = self._hub.data.value(self._index)
+        if self._hub.should_publish(self.entity_description, self._published, value):
+            self._published = (value, time.monotonic())
+            self.async_write_ha_state()
+
+    @property
+    def available(self) -> bool:
+        """Stay available with a restored value until the first live poll.
+
+        Before it the unit may be offline, which is when the restored value
+        is worth showing.
+        """
+        if self._hub.stale and self._hub.data.value(self._index) is not None:
+            return True
+        return super().available
+
+    @property
+    def extra_state_attributes(self):
+        """Flag a value restored from the last run until the first poll."""
+        if self._hub.stale:
+            return {ATTR_RESTORED_AT: self._hub.snapshot_time}
+        return None
+
+    @property
+    def name(self):
+        """Return the name."""
+        return f"{self._platform_name} {self.entity_description.name}"
+
+    @property
+    def unique_id(self) -> Optional[str]:
+        return f"{self._hub.unique_id}_{self.entity_description.key}"
@@ -0,0 +1,80 @@
+"""Counters and histograms of the Modbus request path."""
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from typing import Any
+
+# upper bounds in seconds of the histogram buckets, the last one is open
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+class Histogram:
+    """Distribution of durations in fixed buckets."""
+
+    __slots__ = ("buckets", "counts", "count", "total", "max", "last")
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.last = None
+
+    def observe(self, value: float) -> None:
+        """Add a duration in seconds."""
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+        self.last = value
+        if value > self.max:
+            self.max = value
+
+    @property
+    def mean(self):
+        """Return the mean duration, None before the first one."""
+        return self.total / self.count if self.count else None
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the histogram in milliseconds as plain data."""
+        bounds = [f"le_{bound * 1000:g}ms" for bound in self.buckets] + ["inf"]
+        return {
+            "count": self.count,
+            "mean_ms": None if self.mean is None else round(self.mean * 1000, 3),
+            "max_ms": round(self.max * 1000, 3),
+            "last_ms": None if self.last is None else round(self.last * 1000, 3),
+            "buckets": dict(zip(bounds, self.counts)),
+        }
+
+
+@dataclass
+class ClientMetrics:
+    """What a client saw on its request path."""
+
+    requests: int = 0
+    timeouts: int = 0
+    errors: int = 0
+    retries: int = 0
+    connects: int = 0
+    # round trip on the wire, wait for a slot in the in-flight window and
+    # wait for the limiter shared between clients
+    rtt: Histogram = field(default_factory=Histogram)
+    queue_wait: Histogram = field(default_factory=Histogram)
+    limiter_wait: Histogram = field(default_factory=Histogram)
+
+    @property
+    def reconnects(self) -> int:
+        """Return the number of connections after the first one."""
+        return max(0, self.connects - 1)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the metrics as plain data."""
+        return {
+            "requests": self.requests,
+            "timeouts": self.timeouts,
+            "errors": self.errors,
+            "retries": self.retries,
+            "reconnects": self.reconnects,
+            "rtt": self.rtt.as_dict(),
+            "queue_wait": self.queue_wait.as_dict(),
+            "limiter_wait": self.limiter_wait.as_dict(),
+        }
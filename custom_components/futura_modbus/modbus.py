@@ -0,0 +1,739 @@
+"""Asyncio Modbus TCP client for Futura."""
+import asyncio
+import contextlib
+from enum import IntEnum
+import heapq
+import itertools
+import logging
+import random
+import socket
+import struct
+import time
+from typing import Callable, Optional
+
+from .metrics import ClientMetrics
+
+_LOGGER = logging.getLogger(__name__)
+
+# transaction id, protocol id, length, unit id
+MBAP_HEADER = struct.Struct(">HHHB")
+MODBUS_PROTOCOL_ID = 0
+
+READ_HOLDING_REGISTERS = 0x03
+READ_INPUT_REGISTERS = 0x04
+WRITE_SINGLE_REGISTER = 0x06
+WRITE_MULTIPLE_REGISTERS = 0x10
+
+EXCEPTION_FLAG = 0x80
+EXCEPTION_ACKNOWLEDGE = 0x05
+EXCEPTION_SERVER_BUSY = 0x06
+# the device is still working on an earlier request
+BUSY_EXCEPTIONS = (EXCEPTION_ACKNOWLEDGE, EXCEPTION_SERVER_BUSY)
+# a gateway could not reach the unit behind it
+GATEWAY_EXCEPTIONS = (0x0A, 0x0B)
+MAX_READ_COUNT = 125
+MAX_WRITE_COUNT = 123
+
+DEFAULT_UNIT_ID = 1
+DEFAULT_TIMEOUT = 5
+DEFAULT_PIPELINE_DEPTH = 4
+
+RECONNECT_BACKOFF_MIN = 1
+RECONNECT_BACKOFF_MAX = 60
+
+# seconds of serial requests after a rejected pipeline before trying again
+PIPELINE_RETRY_INTERVAL = 300
+
+# seconds of idle time before probing, between probes, and probes before giving up
+KEEPALIVE_IDLE = 30
+KEEPALIVE_INTERVAL = 10
+KEEPALIVE_COUNT = 3
+
+
+class RequestPriority(IntEnum):
+    """Order in which queued requests get a slot, lowest first."""
+
+    WRITE = 0
+    READBACK = 1
+    POLL = 2
+
+
+class CircuitBreaker:
+    """Opens for a jittered, exponentially growing backoff after failures."""
+
+    def __init__(self):
+        """Initialize the breaker, closed."""
+        self.failures = 0
+        self.retry_at = 0.0
+
+    @property
+    def is_open(self) -> bool:
+        """Return True while requests are short-circuited after failures."""
+        return time.monotonic() < self.retry_at
+
+    def record_failure(self) -> None:
+        """Open for a backoff that doubles with each consecutive failure."""
+        self.failures += 1
+        backoff = min(
+            RECONNECT_BACKOFF_MAX,
+            RECONNECT_BACKOFF_MIN * 2 ** (self.failures - 1),
+        )
+        self.retry_at = time.monotonic() + random.uniform(backoff / 2, backoff)
+
+    def record_success(self) -> None:
+        """Close and forget the failures."""
+        self.failures = 0
+        self.retry_at = 0.0
+
+
+TRANSPORT_ERRORS = (
+    OSError,
+    ValueError,
+    asyncio.IncompleteReadError,
+    asyncio.TimeoutError,
+)
+
+
+class FuturaModbusClient:
+    """Modbus TCP client running directly on the event loop.
+
+    Up to pipeline_depth requests are kept in flight on the socket and replies
+    are matched to them by MBAP transaction id. If the device answers a
+    request as busy while others are outstanding, the request is retried
+    alone and the client sends one request at a time for
+    PIPELINE_RETRY_INTERVAL before pipelining again. Transport failures are
+    not taken for a rejected pipeline.
+
+    Requests waiting for a slot are served by RequestPriority, so user writes
+    overtake queued polls. A request cancelled while still queued is dropped
+    without being sent; one cancelled on the wire keeps its slot until the
+    reply arrives.
+
+    A limiter shared between clients, such as a semaphore, caps the requests
+    in flight across all of them.
+
+    The connection is kept open between requests. After a transport failure
+    the circuit opens: requests fail immediately without touching the socket
+    until an exponentially growing, jittered backoff has passed, after which
+    a single reconnect is attempted.
+
+    Each unit id has a circuit of its own as well. A unit that times out
+    while the connection still carries frames, or that its gateway reports
+    unreachable, opens only its own circuit, so units sharing the socket
+    keep being served. The socket is dropped once two timeouts pass without
+    any frame in between.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        unit_id: int = DEFAULT_UNIT_ID,
+        timeout: float = DEFAULT_TIMEOUT,
+        pipeline_depth: int = DEFAULT_PIPELINE_DEPTH,
+        limiter: Optional[asyncio.Semaphore] = None,
+    ):
+        """Initialize the client."""
+        self._host = host
+        self._port = int(port)
+        self._unit_id = unit_id
+        self._timeout = timeout
+        self._pipeline_depth = max(1, pipeline_depth)
+        self._max_pipeline_depth = self._pipeline_depth
+        self._pipeline_retry_at: Optional[float] = None
+        self._limiter = limiter if limiter is not None else contextlib.nullcontext()
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._read_task: Optional[asyncio.Task] = None
+        self._connect_lock = asyncio.Lock()
+        self._waiters: list[tuple[int, int, asyncio.Future]] = []
+        self._queued: set[asyncio.Task] = set()
+        self._sequence = itertools.count()
+        self._in_flight = 0
+        self._pending: dict[int, asyncio.Future] = {}
+        self._transaction_id = 0
+        self._breaker = CircuitBreaker()
+        self._unit_breakers: dict[int, CircuitBreaker] = {}
+        # perf_counter times the last frame arrived and the last request
+        # timed out
+        self._last_frame = 0.0
+        self._last_timeout = 0.0
+        self.last_error: Optional[str] = None
+        self.metrics = ClientMetrics()
+        # set to a TrafficRecorder to capture every transaction
+        self.recorder = None
+
+    @property
+    def is_open(self) -> bool:
+        """Return True if the socket is connected."""
+        return self._writer is not None and not self._writer.is_closing()
+
+    @property
+    def circuit_open(self) -> bool:
+        """Return True while connecting is short-circuited after failures."""
+        return self._breaker.is_open
+
+    @property
+    def failures(self) -> int:
+        """Return the number of consecutive transport failures."""
+        return self._breaker.failures
+
+    def unit_breaker(self, unit_id: int) -> CircuitBreaker:
+        """Return the circuit breaker of the unit id."""
+        breaker = self._unit_breakers.get(unit_id)
+        if breaker is None:
+            breaker = self._unit_breakers[unit_id] = CircuitBreaker()
+        return breaker
+
+    @property
+    def pipeline_depth(self) -> int:
+        """Return the number of requests allowed in flight."""
+        return self._pipeline_depth
+
+    def limit_pipeline_depth(self, depth: int) -> None:
+        """Keep at most depth requests in flight from now on."""
+        self._max_pipeline_depth = max(1, min(self._max_pipeline_depth, depth))
+        self._pipeline_depth = min(self._pipeline_depth, self._max_pipeline_depth)
+
+    async def open(self) -> bool:
+        """Connect to the device."""
+        async with self._connect_lock:
+            if self.is_open:
+                return True
+            if self.circuit_open:
+                return False
+            try:
+                reader, writer = await asyncio.wait_for(
+                    asyncio.open_connection(self._host, self._port), self._timeout
+                )
+            except (OSError, asyncio.TimeoutError) as err:
+                self.last_error = (
+                    f"connect to {self._host}:{self._port} failed: {err!r}"
+                )
+                _LOGGER.debug(self.last_error)
+                self._breaker.record_failure()
+                return False
+            _configure_socket(writer.get_extra_info("socket"))
+            self._reader, self._writer = reader, writer
+            self._last_frame = time.perf_counter()
+            self.metrics.connects += 1
+            self._read_task = asyncio.get_running_loop().create_task(
+                self._read_loop(reader)
+            )
+        return True
+
+    async def close(self) -> None:
+        """Disconnect from the device."""
+        writer = self._disconnect()
+        if writer is None:
+            return
+        try:
+            await writer.wait_closed()
+        except OSError:
+            pass
+
+    async def read_holding_registers(
+        self,
+        address: int,
+        count: int,
+        priority: RequestPriority = RequestPriority.POLL,
+        *,
+        unit_id: Optional[int] = None,
+    ) -> Optional[list[int]]:
+        """Read holding registers (FC3)."""
+        return _unpack_registers(
+            await self.read_registers_raw(
+                READ_HOLDING_REGISTERS, address, count, priority, unit_id=unit_id
+            )
+        )
+
+    async def read_input_registers(
+        self,
+        address: int,
+        count: int,
+        priority: RequestPriority = RequestPriority.POLL,
+        *,
+        unit_id: Optional[int] = None,
+    ) -> Optional[list[int]]:
+        """Read input registers (FC4)."""
+        return _unpack_registers(
+            await self.read_registers_raw(
+                READ_INPUT_REGISTERS, address, count, priority, unit_id=unit_id
+            )
+        )
+
+    async def write_single_register(
+        self,
+        address: int,
+        value: int,
+        priority: RequestPriority = RequestPriority.WRITE,
+        *,
+        unit_id: Optional[int] = None,
+    ) -> bool:
+        """Write a single holding register (FC6)."""
+        pdu = struct.pack(">BHH", WRITE_SINGLE_REGISTER, address, value)
+        response = await self._request(pdu, priority, unit_id)
+        return response == pdu
+
+    async def write_multiple_registers(
+        self,
+        address: int,
+        values: list[int],
+        priority: RequestPriority = RequestPriority.WRITE,
+        *,
+        unit_id: Optional[int] = None,
+    ) -> bool:
+        """Write a block of contiguous holding registers (FC16)."""
+        count = len(values)
+        if not 1 <= count <= MAX_WRITE_COUNT:
+            raise ValueError(f"register count {count} out of range")
+        header = struct.pack(">BHH", WRITE_MULTIPLE_REGISTERS, address, count)
+        response = await self._request(
+            header + struct.pack(f">B{count}H", 2 * count, *values),
+            priority,
+            unit_id,
+        )
+        return response == header
+
+    async def read_registers_raw(
+        self,
+        function_code: int,
+        address: int,
+        count: int,
+        priority: RequestPriority = RequestPriority.POLL,
+        *,
+        unit_id: Optional[int] = None,
+    ) -> Optional[memoryview]:
+        """Read a block of registers and return their big-endian bytes."""
+        if not 1 <= count <= MAX_READ_COUNT:
+            raise ValueError(f"register count {count} out of range")
+        response = await self._request(
+            struct.pack(">BHH", function_code, address, count), priority, unit_id
+        )
+        if response is None:
+            return None
+        if len(response) != 2 + 2 * count or response[1] != 2 * count:
+            self.last_error = f"malformed response to FC{function_code}"
+            _LOGGER.debug(self.last_error)
+            return None
+        return memoryview(response)[2:]
+
+    def _next_transaction_id(self) -> int:
+        """Return the next free MBAP transaction id."""
+        while True:
+            self._transaction_id = (self._transaction_id + 1) & 0xFFFF
+            if self._transaction_id not in self._pending:
+                return self._transaction_id
+
+    async def _request(
+        self, pdu: bytes, priority: RequestPriority, unit_id: Optional[int] = None
+    ) -> Optional[bytes]:
+        """Send a request PDU and return the matching response PDU."""
+        response = await self._transact(
+            pdu, priority, self._unit_id if unit_id is None else unit_id
+        )
+        if response is None:
+            return None
+        if response[0] == pdu[0] | EXCEPTION_FLAG:
+            self.last_error = f"FC{pdu[0]} exception code {response[1:2].hex()}"
+            _LOGGER.debug(self.last_error)
+            return None
+        if response[0] != pdu[0]:
+            self.last_error = f"unexpected function code {response[0]}"
+            _LOGGER.debug(self.last_error)
+            return None
+        return response
+
+    async def _transact(
+        self, pdu: bytes, priority: RequestPriority, unit_id: int
+    ) -> Optional[bytes]:
+        """Run one transaction once a slot in the in-flight window is free."""
+        loop = asyncio.get_running_loop()
+        while True:
+            self._resume_pipelining()
+            pipelined = self._pipeline_depth > 1
+            queued = time.perf_counter()
+            await self._acquire_slot(priority)
+            self.metrics.queue_wait.observe(time.perf_counter() - queued)
+            # once a request is on the wire it must finish to keep its slot
+            response, overlapped = await asyncio.shield(
+                loop.create_task(self._exchange(pdu, unit_id))
+            )
+
+            # the device answered, but was busy with the other requests
+            rejected = (
+                response is not None
+                and response[0] == pdu[0] | EXCEPTION_FLAG
+                and len(response) > 1
+                and response[1] in BUSY_EXCEPTIONS
+            )
+            if not (rejected and overlapped and pipelined):
+                return response
+            self._fall_back_to_serial()
+            self.metrics.retries += 1
+
+    async def _exchange(
+        self, pdu: bytes, unit_id: int
+    ) -> tuple[Optional[bytes], bool]:
+        """Send pdu in an acquired slot.
+
+        Return the response, or None on failure, and whether other requests
+        were in flight at the same time.
+        """
+        overlapped = self._in_flight > 1
+        metrics = self.metrics
+        unit_breaker = self.unit_breaker(unit_id)
+        sent = writer = None
+        try:
+            if unit_breaker.is_open:
+                self.last_error = f"unit {unit_id} unreachable, retrying later"
+                return None, False
+            queued = time.perf_counter()
+            async with self._limiter:
+                metrics.limiter_wait.observe(time.perf_counter() - queued)
+                if not await self.open():
+                    return None, False
+                writer = self._writer
+                metrics.requests += 1
+                sent = time.perf_counter()
+                response = await self._send(pdu, unit_id)
+                rtt = time.perf_counter() - sent
+                metrics.rtt.observe(rtt)
+                if self.recorder is not None:
+                    self.recorder.record(unit_id, pdu, response, sent, rtt)
+        except TRANSPORT_ERRORS as err:
+            if isinstance(err, asyncio.TimeoutError):
+                metrics.timeouts += 1
+            else:
+                metrics.errors += 1
+            if self.recorder is not None and sent is not None:
+                self.recorder.record(
+                    unit_id, pdu, None, sent, time.perf_counter() - sent, repr(err)
+                )
+            self.last_error = f"request FC{pdu[0]} failed: {err!r}"
+            _LOGGER.debug(self.last_error)
+            overlapped = overlapped or self._in_flight > 1
+            if writer is None or writer is not self._writer:
+                # the connection was lost, and counted, by another request
+                return None, overlapped
+            if isinstance(err, asyncio.TimeoutError) and self._heard_since_timeout():
+                # the connection carried frames since the last timeout, so
+                # only this unit is silent
+                unit_breaker.record_failure()
+            else:
+                # one failure per lost connection, however many requests
+                # were in flight on it
+                self._breaker.record_failure()
+                await self.close()
+            return None, overlapped
+        finally:
+            self._release_slot()
+        self._breaker.record_success()
+        if (
+            response[0] & EXCEPTION_FLAG
+            and len(response) > 1
+            and response[1] in GATEWAY_EXCEPTIONS
+        ):
+            unit_breaker.record_failure()
+        else:
+            unit_breaker.record_success()
+        return response, overlapped
+
+    def _heard_since_timeout(self) -> bool:
+        """Note a timeout, return True if a frame arrived since the last one."""
+        heard = self._last_frame > self._last_timeout
+        self._last_timeout = time.perf_counter()
+        return heard
+
+    def cancel_queued(self, tasks) -> None:
+        """Cancel those of tasks whose request still waits for a slot.
+
+        Requests already on the wire are left to finish.
+        """
+        for task in tasks:
+            if task in self._queued:
+                task.cancel()
+
+    async def _acquire_slot(self, priority: RequestPriority) -> None:
+        """Wait for a free slot, served in priority order."""
+        if self._in_flight < self._pipeline_depth and not self._waiters:
+            self._in_flight += 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), future))
+        task = asyncio.current_task()
+        self._queued.add(task)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # the slot was handed over just before the cancellation
+                self._release_slot()
+            raise
+        finally:
+            self._queued.discard(task)
+
+    def _release_slot(self) -> None:
+        """Free a slot and hand it to the most urgent waiter."""
+        self._in_flight -= 1
+        while self._waiters and self._in_flight < self._pipeline_depth:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                self._in_flight += 1
+                future.set_result(None)
+
+    async def _send(self, pdu: bytes, unit_id: int) -> bytes:
+        """Write one frame and wait for the reply with the same transaction id."""
+        if self._writer is None:
+            raise ConnectionError("connection closed")
+        transaction_id = self._next_transaction_id()
+        future = asyncio.get_running_loop().create_future()
+        self._pending[transaction_id] = future
+        try:
+            self._writer.write(
+                MBAP_HEADER.pack(
+                    transaction_id, MODBUS_PROTOCOL_ID, len(pdu) + 1, unit_id
+                )
+                + pdu
+            )
+            await self._writer.drain()
+            return await asyncio.wait_for(future, self._timeout)
+        finally:
+            self._pending.pop(transaction_id, None)
+
+    def _fall_back_to_serial(self) -> None:
+        """Stop pipelining after the device rejected overlapping requests."""
+        self._pipeline_retry_at = time.monotonic() + PIPELINE_RETRY_INTERVAL
+        if self._pipeline_depth == 1:
+            return
+        _LOGGER.warning(
+            "Modbus device at %s:%s rejected pipelined requests, "
+            "sending serial requests for %s seconds",
+            self._host,
+            self._port,
+            PIPELINE_RETRY_INTERVAL,
+        )
+        self._pipeline_depth = 1
+
+    def _resume_pipelining(self) -> None:
+        """Pipeline again once the serial period after a fallback is over."""
+        retry_at = self._pipeline_retry_at
+        if retry_at is None or time.monotonic() < retry_at:
+            return
+        self._pipeline_retry_at = None
+        self._pipeline_depth = self._max_pipeline_depth
+        _LOGGER.debug(
+            "Trying pipelined requests to %s:%s again", self._host, self._port
+        )
+
+    async def _read_loop(self, reader: asyncio.StreamReader) -> None:
+        """Dispatch incoming frames to the requests waiting for them."""
+        try:
+            while True:
+                header = await reader.readexactly(MBAP_HEADER.size)
+                transaction_id, protocol_id, length, _unit_id = MBAP_HEADER.unpack(
+                    header
+                )
+                if length < 2:
+                    raise ValueError(f"invalid MBAP length {length}")
+                pdu = await reader.readexactly(length - 1)
+                self._last_frame = time.perf_counter()
+                future = self._pending.pop(transaction_id, None)
+                if (
+                    future is None
+                    or future.done()
+                    or protocol_id != MODBUS_PROTOCOL_ID
+                ):
+                    # late reply to a request that already timed out
+                    _LOGGER.debug(
+                        "Discarding stale frame with transaction id %s",
+                        transaction_id,
+                    )
+                    continue
+                future.set_result(pdu)
+        except TRANSPORT_ERRORS as err:
+            if reader is self._reader:
+                self.last_error = f"connection lost: {err!r}"
+                _LOGGER.debug(self.last_error)
+                self._breaker.record_failure()
+                self._disconnect()
+
+    def _disconnect(self) -> Optional[asyncio.StreamWriter]:
+        """Drop the connection and fail the outstanding requests."""
+        writer, read_task = self._writer, self._read_task
+        self._reader = self._writer = self._read_task = None
+        if read_task is not None and read_task is not asyncio.current_task():
+            read_task.cancel()
+        pending, self._pending = self._pending, {}
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(ConnectionError("connection closed"))
+        if writer is not None:
+            writer.close()
+        return writer
+
+
+class FuturaModbusUnit:
+    """One unit id on a client that may be shared with other units."""
+
+    def __init__(self, client: FuturaModbusClient, unit_id: int):
+        """Initialize the unit."""
+        self.client = client
+        self.unit_id = unit_id
+
+    @property
+    def is_open(self) -> bool:
+        """Return True if the shared socket is connected."""
+        return self.client.is_open
+
+    @property
+    def last_error(self) -> Optional[str]:
+        """Return the last error of the shared client."""
+        return self.client.last_error
+
+    @property
+    def metrics(self) -> ClientMetrics:
+        """Return the metrics of the shared client."""
+        return self.client.metrics
+
+    def cancel_queued(self, tasks) -> None:
+        """Cancel those of tasks whose request still waits for a slot."""
+        self.client.cancel_queued(tasks)
+
+    async def read_holding_registers(
+        self,
+        address: int,
+        count: int,
+        priority: RequestPriority = RequestPriority.POLL,
+    ) -> Optional[list[int]]:
+        """Read holding registers (FC3) of this unit."""
+        return await self.client.read_holding_registers(
+            address, count, priority, unit_id=self.unit_id
+        )
+
+    async def read_input_registers(
+        self,
+        address: int,
+        count: int,
+        priority: RequestPriority = RequestPriority.POLL,
+    ) -> Optional[list[int]]:
+        """Read input registers (FC4) of this unit."""
+        return await self.client.read_input_registers(
+            address, count, priority, unit_id=self.unit_id
+        )
+
+    async def read_registers_raw(
+        self,
+        function_code: int,
+        address: int,
+        count: int,
+        priority: RequestPriority = RequestPriority.POLL,
+    ) -> Optional[memoryview]:
+        """Read a block of registers of this unit as big-endian bytes."""
+        return await self.client.read_registers_raw(
+            function_code, address, count, priority, unit_id=self.unit_id
+        )
+
+    async def write_single_register(
+        self,
+        address: int,
+        value: int,
+        priority: RequestPriority = RequestPriority.WRITE,
+    ) -> bool:
+        """Write a single holding register (FC6) of this unit."""
+        return await self.client.write_single_register(
+            address, value, priority, unit_id=self.unit_id
+        )
+
+    async def write_multiple_registers(
+        self,
+        address: int,
+        values: list[int],
+        priority: RequestPriority = RequestPriority.WRITE,
+    ) -> bool:
+        """Write contiguous holding registers (FC16) of this unit."""
+        return await self.client.write_multiple_registers(
+            address, values, priority, unit_id=self.unit_id
+        )
+
+
+class FuturaModbusPool:
+    """Shares one client per gateway (host, port) between the units behind it.
+
+    Units on the same gateway use one socket and one request queue, so the
+    gateway sees a single connection. Once several unit ids share a gateway
+    the client sends one request at a time, as the units usually sit on one
+    serial bus that cannot take overlapping requests.
+    """
+
+    def __init__(
+        self,
+        limiter: Optional[asyncio.Semaphore] = None,
+        client_factory: Callable[..., FuturaModbusClient] = FuturaModbusClient,
+    ):
+        """Initialize the pool."""
+        self._limiter = limiter
+        self._client_factory = client_factory
+        self._clients: dict[tuple[str, int], FuturaModbusClient] = {}
+        self._units: dict[tuple[str, int], list[FuturaModbusUnit]] = {}
+
+    def acquire(
+        self,
+        host: str,
+        port: int,
+        unit_id: int = DEFAULT_UNIT_ID,
+        timeout: float = DEFAULT_TIMEOUT,
+        pipeline_depth: int = DEFAULT_PIPELINE_DEPTH,
+    ) -> FuturaModbusUnit:
+        """Return a unit on the shared client of host and port."""
+        key = (host, int(port))
+        client = self._clients.get(key)
+        if client is None:
+            client = self._clients[key] = self._client_factory(
+                host,
+                port,
+                unit_id=unit_id,
+                timeout=timeout,
+                pipeline_depth=pipeline_depth,
+                limiter=self._limiter,
+            )
+        else:
+            client.limit_pipeline_depth(pipeline_depth)
+        unit = FuturaModbusUnit(client, unit_id)
+        units = self._units.setdefault(key, [])
+        units.append(unit)
+        if len(units) > 1:
+            client.limit_pipeline_depth(1)
+        return unit
+
+    async def release(self, unit: FuturaModbusUnit) -> None:
+        """Drop unit, closing the client once no unit uses it."""
+        for key, units in self._units.items():
+            if unit in units:
+                units.remove(unit)
+                if not units:
+                    del self._units[key]
+                    await self._clients.pop(key).close()
+                return
+
+
+def _unpack_registers(payload: Optional[memoryview]) -> Optional[list[int]]:
+    """Unpack raw register bytes into 16-bit values."""
+    if payload is None:
+        return None
+    return list(struct.unpack(f">{len(payload) // 2}H", payload))
+
+
+def _configure_socket(sock) -> None:
+    """Disable Nagle and enable TCP keep-alive probes on sock."""
+    if sock is None:
+        return
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+    for option, value in (
+        ("TCP_KEEPIDLE", KEEPALIVE_IDLE),
+        ("TCP_KEEPINTVL", KEEPALIVE_INTERVAL),
+        ("TCP_KEEPCNT", KEEPALIVE_COUNT),
+    ):
+        if hasattr(socket, option):
+            sock.setsockopt(socket.IPPROTO_TCP, getattr(socket, option), value)
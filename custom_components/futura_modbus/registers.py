@@ -0,0 +1,519 @@
+"""Futura register map, read planner and block decoder."""
+from dataclasses import dataclass, field
+from enum import Enum
+import struct
+from typing import Any, Iterable, Optional, Sequence, Union
+
+from .modbus import MAX_READ_COUNT, MAX_WRITE_COUNT
+
+DEFAULT_MAX_READ_GAP = 16
+# raw units a countdown may tick down between its write and the read-back
+COUNTDOWN_TOLERANCE = 10
+
+
+class RegisterTable(Enum):
+    """Modbus register tables."""
+
+    INPUT = "input"
+    HOLDING = "holding"
+
+
+class RegisterGroup(Enum):
+    """Registers polled together at the same interval."""
+
+    FAST = "fast"  # power and fan values, every scan interval
+    NORMAL = "normal"  # temperatures, humidities and running state
+    SLOW = "slow"  # configuration flags
+    STATIC = "static"  # identity, read once
+
+
+class RegisterType(Enum):
+    """Register encodings."""
+
+    U16 = "u16"
+    S16 = "s16"
+    U32 = "u32"
+
+    @property
+    def size(self) -> int:
+        """Return the number of 16-bit registers used."""
+        return 2 if self is RegisterType.U32 else 1
+
+    @property
+    def format(self) -> str:
+        """Return the big-endian struct format character."""
+        return _FORMATS[self]
+
+
+_FORMATS = {RegisterType.U16: "H", RegisterType.S16: "h", RegisterType.U32: "I"}
+
+
+@dataclass(frozen=True)
+class FuturaRegister:
+    """Describes one value in the Futura register map."""
+
+    key: str
+    address: int
+    table: RegisterTable = RegisterTable.INPUT
+    type: RegisterType = RegisterType.U16
+    scale: float = 1
+    precision: Optional[int] = None
+    group: RegisterGroup = RegisterGroup.NORMAL
+    offset: float = 0
+    # counted down by the device, in seconds
+    countdown: bool = False
+
+    @property
+    def end(self) -> int:
+        """Return the address following this register."""
+        return self.address + self.type.size
+
+    def decode(self, registers: Sequence[int], offset: int) -> Any:
+        """Decode the value starting at offset in a block of registers."""
+        value = registers[offset]
+        if self.type is RegisterType.S16:
+            if value & 0x8000:
+                value -= 0x10000
+        elif self.type is RegisterType.U32:
+            value = (value << 16) | registers[offset + 1]
+
+        if self.scale != 1:
+            value *= self.scale
+        if self.offset:
+            value += self.offset
+        if self.precision is not None:
+            value = round(value, self.precision)
+        return value
+
+    def encode(self, value: Any) -> list[int]:
+        """Encode value into the raw registers to write."""
+        value -= self.offset
+        raw = round(value / self.scale) if self.scale != 1 else int(value)
+        if self.type is RegisterType.U32:
+            return [(raw >> 16) & 0xFFFF, raw & 0xFFFF]
+        return [raw & 0xFFFF]
+
+
+def _input(
+    key,
+    address,
+    type=RegisterType.U16,
+    scale=1,
+    precision=None,
+    group=RegisterGroup.NORMAL,
+):
+    return FuturaRegister(
+        key, address, RegisterTable.INPUT, type, scale, precision, group
+    )
+
+
+def _holding(
+    key,
+    address,
+    type=RegisterType.U16,
+    scale=1,
+    precision=None,
+    group=RegisterGroup.SLOW,
+    countdown=False,
+):
+    return FuturaRegister(
+        key,
+        address,
+        RegisterTable.HOLDING,
+        type,
+        scale,
+        precision,
+        group,
+        countdown=countdown,
+    )
+
+
+REGISTERS: dict[str, FuturaRegister] = {
+    register.key: register
+    for register in (
+        # input registers
+        _input("fact_device_id", 0, group=RegisterGroup.STATIC),
+        _input("fact_serial_number", 1, RegisterType.U32, group=RegisterGroup.STATIC),
+        _input("fact_ethernet_mac_1", 3, group=RegisterGroup.STATIC),
+        _input("fact_ethernet_mac_2", 4, group=RegisterGroup.STATIC),
+        _input("fact_ethernet_mac_3", 5, group=RegisterGroup.STATIC),
+        _input("sys_options", 14, group=RegisterGroup.STATIC),
+        _input("fut_config", 15, group=RegisterGroup.SLOW),
+        _input("fut_mode", 16, RegisterType.U32),
+        _input("fut_error", 18, RegisterType.U32),
+        _input("fut_warning", 20, RegisterType.U32),
+        _input("fut_temp_ambient", 30, RegisterType.S16, 0.1, 1),
+        _input("fut_temp_fresh", 31, RegisterType.S16, 0.1, 1),
+        _input("fut_temp_indoor", 32, RegisterType.S16, 0.1, 1),
+        _input("fut_temp_waste", 33, RegisterType.S16, 0.1, 1),
+        _input("fut_humi_ambient", 34, scale=0.1, precision=1),
+        _input("fut_humi_fresh", 35, scale=0.1, precision=1),
+        _input("fut_humi_indoor", 36, scale=0.1, precision=1),
+        _input("fut_humi_waste", 37, scale=0.1, precision=1),
+        _input("fut_t_out", 38, RegisterType.S16, 0.1, 1),
+        _input("fut_filter_wear_level", 40, group=RegisterGroup.SLOW),
+        _input("fut_power_consumption", 41, group=RegisterGroup.FAST),
+        _input("fut_heat_recovering", 42, group=RegisterGroup.FAST),
+        _input("fut_heating_power", 43, group=RegisterGroup.FAST),
+        _input("fut_air_flow", 44, group=RegisterGroup.FAST),
+        _input("fut_fan_pwm_supply", 45, group=RegisterGroup.FAST),
+        _input("fut_fan_pwm_exhaust", 46, group=RegisterGroup.FAST),
+        _input("fut_fan_rpm_supply", 47, group=RegisterGroup.FAST),
+        _input("fut_fan_rpm_exhaust", 48, group=RegisterGroup.FAST),
+        _input("fut_uint1_voltage", 49),
+        _input("fut_uint2_voltage", 50),
+        _input("fut_dig_inputs", 51),
+        _input(
+            "sys_battery_voltage",
+            52,
+            scale=0.001,
+            precision=3,
+            group=RegisterGroup.SLOW,
+        ),
+        _input("mbdev_stat_reads", 60, RegisterType.U32),
+        _input("mbdev_stat_writes", 62, RegisterType.U32),
+        _input("mbdev_stat_fails", 64, RegisterType.U32),
+        _input("mbdev_connected_mk_ui", 66, group=RegisterGroup.SLOW),
+        _input(
+            "mbdev_connected_mk_sens",
+            67,
+            RegisterType.U32,
+            group=RegisterGroup.SLOW,
+        ),
+        _input("mbdev_connected_coolbreeze", 69, group=RegisterGroup.SLOW),
+        _input(
+            "mbdev_connected_valve_supply",
+            70,
+            RegisterType.U32,
+            group=RegisterGroup.SLOW,
+        ),
+        _input(
+            "mbdev_connected_valve_exhaust",
+            72,
+            RegisterType.U32,
+            group=RegisterGroup.SLOW,
+        ),
+        _input("mbdev_connected_button", 74, group=RegisterGroup.SLOW),
+        _input("mbdev_connected_alfa", 75, group=RegisterGroup.SLOW),
+        _input("vzv_identity", 80, group=RegisterGroup.STATIC),
+        # holding registers
+        _holding("func_ventilation", 0, group=RegisterGroup.NORMAL),
+        _holding(
+            "func_boost_tm",
+            1,
+            scale=1 / 60,
+            precision=0,
+            group=RegisterGroup.NORMAL,
+            countdown=True,
+        ),
+        _holding(
+            "func_circulation_tm", 2, group=RegisterGroup.NORMAL, countdown=True
+        ),
+        _holding(
+            "func_overpressure_tm", 3, group=RegisterGroup.NORMAL, countdown=True
+        ),
+        _holding("func_night_tm", 4, group=RegisterGroup.NORMAL, countdown=True),
+        _holding("func_party_tm", 5, group=RegisterGroup.NORMAL, countdown=True),
+        _holding("func_away_begin", 6, RegisterType.U32, group=RegisterGroup.NORMAL),
+        _holding("func_away_end", 8, RegisterType.U32, group=RegisterGroup.NORMAL),
+        _holding("cfg_temp_set", 10, scale=0.1, precision=1),
+        _holding("cfg_humi_set", 11, scale=0.1, precision=1),
+        _holding("func_time_prog", 12, group=RegisterGroup.NORMAL),
+        _holding("func_antiradon", 13, group=RegisterGroup.NORMAL),
+        _holding("cfg_bypass_enable", 14),
+        _holding("cfg_heating_enable", 15),
+        _holding("cfg_cooling_enable", 16),
+        _holding("cfg_comfort_enable", 17),
+        _holding("vzv_cb_priority_control", 20),
+        _holding("vzv_kitchenhood_normally_open", 21),
+        _holding("vzv_boost_volume_per_run", 22),
+        _holding("vzv_kitchenhood_boost_volume_per_run", 23),
+    )
+}
+
+
+class PeripheralType(Enum):
+    """Kinds of peripherals connected to Futura."""
+
+    UI = "ui"
+    SENSOR = "sensor"
+    ALFA = "alfa"
+    EXT_SENSOR = "ext_sensor"
+    BUTTON = "button"
+
+
+@dataclass(frozen=True)
+class PeripheralField:
+    """One register in the block of each peripheral."""
+
+    name: str
+    type: RegisterType = RegisterType.U16
+    scale: float = 1
+    precision: Optional[int] = None
+    group: RegisterGroup = RegisterGroup.NORMAL
+
+
+@dataclass(frozen=True)
+class PeripheralLayout:
+    """Where the blocks of one kind of peripheral sit in the register map.
+
+    Presence is the bit of the unit in connected_key if set, otherwise the
+    "present" field of the unit itself.
+    """
+
+    table: RegisterTable
+    address: int
+    stride: int
+    count: int
+    fields: tuple[PeripheralField, ...]
+    connected_key: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class Peripheral:
+    """A connected peripheral and the registers of its block."""
+
+    type: PeripheralType
+    index: int
+    registers: tuple[FuturaRegister, ...]
+
+    @property
+    def key(self) -> str:
+        """Return the key prefix of the values of this peripheral."""
+        return f"{self.type.value}_{self.index + 1}"
+
+    def register(self, field_name: str) -> FuturaRegister:
+        """Return the register of a field of this peripheral."""
+        return next(
+            register
+            for register in self.registers
+            if register.key == f"{self.key}_{field_name}"
+        )
+
+
+_ROOM_FIELDS = (
+    PeripheralField("address", group=RegisterGroup.STATIC),
+    PeripheralField("options", group=RegisterGroup.STATIC),
+    PeripheralField("co2"),
+    PeripheralField("temp", RegisterType.S16, 0.1, 1),
+    PeripheralField("humi", scale=0.1, precision=1),
+)
+
+PERIPHERALS: dict[PeripheralType, PeripheralLayout] = {
+    # wall mounted UIs, 100-114
+    PeripheralType.UI: PeripheralLayout(
+        RegisterTable.INPUT, 100, 5, 3, _ROOM_FIELDS, "mbdev_connected_mk_ui"
+    ),
+    # wall mounted sensors, 115-154
+    PeripheralType.SENSOR: PeripheralLayout(
+        RegisterTable.INPUT, 115, 5, 8, _ROOM_FIELDS, "mbdev_connected_mk_sens"
+    ),
+    # Alfa room controllers, 160-235
+    PeripheralType.ALFA: PeripheralLayout(
+        RegisterTable.INPUT,
+        160,
+        10,
+        8,
+        _ROOM_FIELDS + (PeripheralField("ntc_temp", RegisterType.S16, 0.1, 1),),
+        "mbdev_connected_alfa",
+    ),
+    # external sensors, 300-375
+    PeripheralType.EXT_SENSOR: PeripheralLayout(
+        RegisterTable.HOLDING,
+        300,
+        10,
+        8,
+        (
+            PeripheralField("present", group=RegisterGroup.SLOW),
+            PeripheralField("error", group=RegisterGroup.SLOW),
+            PeripheralField("temperature", RegisterType.S16, 0.1, 1),
+            PeripheralField("humidity"),
+            PeripheralField("co2"),
+            PeripheralField("floor_temp", RegisterType.S16, 0.1, 1),
+        ),
+    ),
+    # external buttons, 400-473
+    PeripheralType.BUTTON: PeripheralLayout(
+        RegisterTable.HOLDING,
+        400,
+        10,
+        8,
+        (
+            PeripheralField("present", group=RegisterGroup.SLOW),
+            PeripheralField("mode"),
+            PeripheralField("timer"),
+            PeripheralField("active"),
+        ),
+        "mbdev_connected_button",
+    ),
+}
+
+
+def peripheral(peripheral_type: PeripheralType, index: int) -> Peripheral:
+    """Return the peripheral of a type at index with its registers."""
+    layout = PERIPHERALS[peripheral_type]
+    address = layout.address + index * layout.stride
+    return Peripheral(
+        peripheral_type,
+        index,
+        tuple(
+            FuturaRegister(
+                f"{peripheral_type.value}_{index + 1}_{field.name}",
+                address + offset,
+                layout.table,
+                field.type,
+                field.scale,
+                field.precision,
+                field.group,
+            )
+            for offset, field in enumerate(layout.fields)
+        ),
+    )
+
+
+def presence_registers() -> list[FuturaRegister]:
+    """Return the registers telling which peripherals are connected."""
+    registers = []
+    for peripheral_type, layout in PERIPHERALS.items():
+        if layout.connected_key is not None:
+            registers.append(REGISTERS[layout.connected_key])
+        else:
+            registers.extend(
+                peripheral(peripheral_type, index).register("present")
+                for index in range(layout.count)
+            )
+    return registers
+
+
+def connected_peripherals(values: dict[str, Any]) -> list[Peripheral]:
+    """Return the peripherals present according to the presence values."""
+    connected = []
+    for peripheral_type, layout in PERIPHERALS.items():
+        for index in range(layout.count):
+            unit = peripheral(peripheral_type, index)
+            if layout.connected_key is not None:
+                present = (values.get(layout.connected_key) or 0) >> index & 1
+            else:
+                present = values.get(unit.register("present").key)
+            if present:
+                connected.append(unit)
+    return connected
+
+
+class BlockDecoder:
+    """Decodes a whole block of registers in one pass.
+
+    The layout of the block is compiled once into a big-endian struct format,
+    with pad bytes over the holes, so decoding is a single unpack followed by
+    the scale, offset and rounding of the few fields that need it.
+    """
+
+    def __init__(self, address: int, count: int, registers: Iterable[FuturaRegister]):
+        registers = sorted(registers, key=lambda register: register.address)
+        fmt = [">"]
+        position = address
+        for register in registers:
+            if register.address < position:
+                raise ValueError(f"register {register.key} overlaps its neighbour")
+            if register.address > position:
+                fmt.append(f"{2 * (register.address - position)}x")
+            fmt.append(register.type.format)
+            position = register.end
+        if position > address + count:
+            raise ValueError(f"registers exceed block of {count} at {address}")
+        if position < address + count:
+            fmt.append(f"{2 * (address + count - position)}x")
+
+        self.struct = struct.Struct("".join(fmt))
+        self.keys = tuple(register.key for register in registers)
+        # (field index, scale, offset, precision) of the fields to convert
+        self.conversions = tuple(
+            (index, register.scale, register.offset, register.precision)
+            for index, register in enumerate(registers)
+            if register.scale != 1 or register.offset or register.precision is not None
+        )
+
+    def decode(self, payload: Union[bytes, memoryview]) -> dict[str, Any]:
+        """Decode the raw big-endian bytes of the block."""
+        values = self.struct.unpack(payload)
+        if self.conversions:
+            values = list(values)
+            for index, scale, offset, precision in self.conversions:
+                value = values[index] * scale + offset
+                values[index] = value if precision is None else round(value, precision)
+        return dict(zip(self.keys, values))
+
+
+@dataclass(frozen=True)
+class ReadBlock:
+    """A contiguous range of registers fetched in a single request."""
+
+    table: RegisterTable
+    address: int
+    count: int
+    registers: tuple[FuturaRegister, ...]
+    decoder: BlockDecoder = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        object.__setattr__(
+            self, "decoder", BlockDecoder(self.address, self.count, self.registers)
+        )
+
+    def decode(self, payload: Union[bytes, memoryview]) -> dict[str, Any]:
+        """Decode the registers of this block from its raw bytes."""
+        return self.decoder.decode(payload)
+
+
+def plan_reads(
+    registers: Iterable[FuturaRegister],
+    max_gap: int = DEFAULT_MAX_READ_GAP,
+    max_count: int = MAX_READ_COUNT,
+) -> list[ReadBlock]:
+    """Coalesce registers into the fewest reads.
+
+    Neighbouring registers of the same table are merged into one block as long
+    as the hole between them is at most max_gap registers and the block stays
+    within max_count registers.
+    """
+    registers = tuple(registers)
+    blocks: list[ReadBlock] = []
+    for table in RegisterTable:
+        pending = sorted(
+            {register for register in registers if register.table is table},
+            key=lambda register: (register.address, register.key),
+        )
+        start = end = None
+        members: list[FuturaRegister] = []
+        for register in pending:
+            if (
+                members
+                and register.address - end <= max_gap
+                and max(end, register.end) - start <= max_count
+            ):
+                members.append(register)
+                end = max(end, register.end)
+                continue
+            if members:
+                blocks.append(ReadBlock(table, start, end - start, tuple(members)))
+            start, end, members = register.address, register.end, [register]
+        if members:
+            blocks.append(ReadBlock(table, start, end - start, tuple(members)))
+    return blocks
+
+
+def plan_writes(
+    values: dict[int, int], max_count: int = MAX_WRITE_COUNT
+) -> list[tuple[int, list[int]]]:
+    """Group holding register writes into runs of contiguous addresses.
+
+    Return (start address, values) pairs, each fitting in one request.
+    """
+    runs: list[tuple[int, list[int]]] = []
+    for address in sorted(values):
+        if runs:
+            start, run = runs[-1]
+            if start + len(run) == address and len(run) < max_count:
+                run.append(values[address])
+                continue
+        runs.append((address, [values[address]]))
+    return runs
@@ -0,0 +1,57 @@
+"""Domain-wide scheduling of the Futura hubs."""
+import asyncio
+import math
+from typing import Callable
+
+from homeassistant.core import callback
+
+from .const import MAX_CONCURRENT_REQUESTS
+from .modbus import FuturaModbusClient, FuturaModbusPool
+
+
+class FuturaScheduler:
+    """Spreads the polls of all hubs and caps their requests in flight.
+
+    Each hub gets a phase, an even fraction of its polling interval, and its
+    ticks are aligned to it, so hubs with the same interval take turns
+    instead of all polling at once. Hubs on the same gateway share a client
+    from the pool, and the limiter is shared by all clients.
+    """
+
+    def __init__(
+        self,
+        max_requests: int = MAX_CONCURRENT_REQUESTS,
+        client_factory: Callable[..., FuturaModbusClient] = FuturaModbusClient,
+    ):
+        """Initialize the scheduler."""
+        self.limiter = asyncio.Semaphore(max_requests)
+        self.pool = FuturaModbusPool(self.limiter, client_factory)
+        self._hubs = []
+        self._phases = {}
+
+    @callback
+    def async_add_hub(self, hub):
+        """Give hub a phase, shifting the others to keep them evenly spread."""
+        self._hubs.append(hub)
+        self._async_rebalance()
+
+    @callback
+    def async_remove_hub(self, hub):
+        """Release the phase of hub."""
+        if hub in self._hubs:
+            self._hubs.remove(hub)
+            self._phases.pop(hub, None)
+            self._async_rebalance()
+
+    @callback
+    def _async_rebalance(self):
+        """Spread the phases evenly over the interval."""
+        for index, hub in enumerate(self._hubs):
+            self._phases[hub] = index / len(self._hubs)
+
+    def align(self, hub, when, period):
+        """Return the tick of hub nearest to the monotonic time when."""
+        if period <= 0 or not math.isfinite(period):
+            return when
+        offset = self._phases.get(hub, 0) * period
+        return offset + round((when - offset) / period) * period
@@ -1,5 +1,4 @@
 from homeassistant.const import CONF_NAME
-from homeassistant.core import callback
 from homeassistant.components.sensor import SensorEntity
 import logging
 from typing import Optional
@@ -8,9 +7,14 @@ from typing import Optional
 from .const import (
     ATTR_MANUFACTURER,
     DOMAIN,
+    METRIC_SENSOR_TYPES,
+    PERIPHERAL_NAMES,
     SENSOR_TYPES,
-    FuturaModbusSensorEntityDescription,
+    peripheral_name,
+    peripheral_sensor_descriptions,
+    FuturaModbusMetricSensorEntityDescription,
 )
+from .entity import FuturaModbusEntity
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -19,31 +23,56 @@ async def async_setup_entry(hass, entry, async_add_entities):
     hub_name = entry.data[CONF_NAME]
     hub = hass.data[DOMAIN][hub_name]["hub"]
 
-    device_info = {
-        "identifiers": {(DOMAIN, hub_name)},
-        "name": hub_name,
-        "manufacturer": ATTR_MANUFACTURER,
-        "model": "Futura",
-    }
+    device_info = hub.device_info
 
     entities = []
     for sensor_description in SENSOR_TYPES.values():
         sensor = FuturaModbusSensor(hub_name, hub, device_info, sensor_description)
         entities.append(sensor)
 
+    for metric_description in METRIC_SENSOR_TYPES.values():
+        entities.append(
+            FuturaModbusMetricSensor(hub_name, hub, device_info, metric_description)
+        )
+
+    # only connected peripherals get entities, each as a device of its own
+    for peripheral in hub.peripherals:
+        peripheral_device_info = {
+            "identifiers": {(DOMAIN, f"{hub_name}_{peripheral.key}")},
+            "name": f"{hub_name} {peripheral_name(peripheral)}",
+            "manufacturer": ATTR_MANUFACTURER,
+            "model": PERIPHERAL_NAMES[peripheral.type],
+            "via_device": (DOMAIN, hub_name),
+        }
+        for sensor_description in peripheral_sensor_descriptions(peripheral):
+            entities.append(
+                FuturaModbusSensor(
+                    hub_name, hub, peripheral_device_info, sensor_description
+                )
+            )
+
     async_add_entities(entities)
     return True
 
 
-class FuturaModbusSensor(SensorEntity):
+class FuturaModbusSensor(FuturaModbusEntity, SensorEntity):
     """Class for a Futura Modbus Sensor"""
 
+    @property
+    def native_value(self):
+        """Return sensor state."""
+        return self._hub.data.value(self._index)
+
+
+class FuturaModbusMetricSensor(SensorEntity):
+    """Class for a sensor of the hub's own request metrics"""
+
     def __init__(
         self,
         platform_name,
         hub,
         device_info,
-        description: FuturaModbusSensorEntityDescription,
+        description: FuturaModbusMetricSensorEntityDescription,
     ):
         """Initialize the sensor."""
         self._platform_name = platform_name
@@ -53,20 +82,9 @@ class FuturaModbusSensor(SensorEntity):
 
     async def async_added_to_hass(self) -> None:
         """Register the update callback."""
-        self._hub.async_add_futura_modbus_sensor(self._modbus_data_updated)
-
-    async def async_will_remove_from_hass(self) -> None:
-        """Remove the sensor callback"""
-        self._hub.async_remove_futura_modbus_sensor(self._modbus_data_updated)
-
-    @callback
-    def _modbus_data_updated(self):
-        self.async_write_ha_state()
-
-    @callback
-    def _update_state(self):
-        if self.entity_description.key in self._hub.data:
-            self._state = self._hub.data[self.entity_description.key]
+        self.async_on_remove(
+            self._hub.async_add_metrics_listener(self.async_write_ha_state)
+        )
 
     @property
     def name(self):
@@ -75,13 +93,9 @@ class FuturaModbusSensor(SensorEntity):
 
     @property
     def unique_id(self) -> Optional[str]:
-        return f"{self._platform_name}_{self.entity_description.key}"
+        return f"{self._hub.unique_id}_{self.entity_description.key}"
 
     @property
     def native_value(self):
         """Return sensor state."""
-        return (
-            self._hub.data[self.entity_description.key]
-            if self.entity_description.key in self._hub.data
-            else None
-        )
+        return self.entity_description.value_fn(self._hub)
@@ -0,0 +1,96 @@
+"""Slot-backed snapshot store for the values read from Futura."""
+from typing import Any, Iterable, Mapping, Optional
+
+from .registers import REGISTERS
+
+_MISSING = object()
+
+
+class FuturaData:
+    """Holds the latest value of each register in a fixed slot.
+
+    Keys are resolved to slot indices once, so entities read their value with
+    a plain tuple index. The snapshot tuple is never mutated: updates build a
+    new one and swap it in with a single assignment, so a reader always sees
+    the values of one complete update and never a partially written one.
+    Stores compare equal when they hold the same values.
+    """
+
+    __slots__ = ("_slots", "snapshot")
+
+    def __init__(self, keys: Iterable[str] = REGISTERS):
+        self._slots: dict[str, int] = {key: index for index, key in enumerate(keys)}
+        self.snapshot: tuple[Any, ...] = (None,) * len(self._slots)
+
+    def add(self, keys: Iterable[str]) -> None:
+        """Make room for the values of keys, e.g. of a discovered peripheral."""
+        keys = [key for key in keys if key not in self._slots]
+        for key in keys:
+            self._slots[key] = len(self._slots)
+        self.snapshot = self.snapshot + (None,) * len(keys)
+
+    def index(self, key: str) -> int:
+        """Return the slot of key, to be resolved once at setup."""
+        return self._slots[key]
+
+    def value(self, index: int) -> Any:
+        """Return the value in slot index, None if not read yet."""
+        return self.snapshot[index]
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Return the value of key, or default if not read yet."""
+        index = self._slots.get(key)
+        if index is None:
+            return default
+        value = self.snapshot[index]
+        return default if value is None else value
+
+    def evolve(self, values: Mapping[str, Any]) -> "FuturaData":
+        """Return a copy holding values, sharing the slots of this one."""
+        data = FuturaData.__new__(FuturaData)
+        data._slots = self._slots
+        data.snapshot = self.snapshot
+        data.update(values)
+        return data
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, FuturaData):
+            return NotImplemented
+        return self.snapshot == other.snapshot
+
+    __hash__ = None
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __getitem__(self, key: str) -> Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self.update({key: value})
+
+    def update(self, values: Mapping[str, Any]) -> None:
+        """Write values and swap in the new snapshot at once."""
+        snapshot = list(self.snapshot)
+        for key, value in values.items():
+            snapshot[self._slots[key]] = value
+        self.snapshot = tuple(snapshot)
+
+    def pop(self, key: str, default: Optional[Any] = None) -> Any:
+        """Clear the value of key and return it."""
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            return default
+        self.update({key: None})
+        return value
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the values read so far keyed by register key."""
+        return {
+            key: self.snapshot[index]
+            for key, index in self._slots.items()
+            if self.snapshot[index] is not None
+        }
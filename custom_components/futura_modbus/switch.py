@@ -1,15 +1,14 @@
 import logging
 from homeassistant.components.switch import SwitchEntity
-from homeassistant.core import callback
+from homeassistant.exceptions import HomeAssistantError
 from homeassistant.const import CONF_NAME
 from typing import Any, Optional
 
 from .const import (
     DOMAIN,
-    ATTR_MANUFACTURER,
     SWITCH_TYPES,
-    FuturaModbusSwitchEntityDescription,
 )
+from .entity import FuturaModbusEntity
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -19,12 +18,7 @@ async def async_setup_entry(hass, entry, async_add_entities):
     hub_name = entry.data[CONF_NAME]
     hub = hass.data[DOMAIN][hub_name]["hub"]
 
-    device_info = {
-        "identifiers": {(DOMAIN, hub_name)},
-        "name": hub_name,
-        "manufacturer": ATTR_MANUFACTURER,
-        "model": "Futura",
-    }
+    device_info = hub.device_info
 
     entities = []
     for switch_description in SWITCH_TYPES.values():
@@ -35,56 +29,14 @@ async def async_setup_entry(hass, entry, async_add_entities):
     return True
 
 
-class FuturaModbusSwitch(SwitchEntity):
+class FuturaModbusSwitch(FuturaModbusEntity, SwitchEntity):
     """Class for Futura Modbus switch"""
 
-    def __init__(
-        self,
-        platform_name,
-        hub,
-        device_info,
-        description: FuturaModbusSwitchEntityDescription,
-    ) -> None:
-        """Initialize the switch entity."""
-        self._platform_name = platform_name
-        self._attr_device_info = device_info
-        self._hub = hub
-        self.entity_description = description
-
-    async def async_added_to_hass(self) -> None:
-        """Register the update callback."""
-        self._hub.async_add_futura_modbus_sensor(self._modbus_data_updated)
-
-    async def async_will_remove_from_hass(self) -> None:
-        """Remove the sensor callback"""
-        self._hub.async_remove_futura_modbus_sensor(self._modbus_data_updated)
-
-    @callback
-    def _modbus_data_updated(self):
-        self.async_write_ha_state()
-
-    @callback
-    def _update_state(self):
-        if self.entity_description.key in self._hub.data:
-            self._state = self._hub.data[self.entity_description.key] != 0
-
     @property
     def is_on(self):
         """Return sensor state."""
-        return (
-            self._hub.data[self.entity_description.key] != 0
-            if self.entity_description.key in self._hub.data
-            else None
-        )
-
-    @property
-    def name(self):
-        """Return the name."""
-        return f"{self._platform_name} {self.entity_description.name}"
-
-    @property
-    def unique_id(self) -> Optional[str]:
-        return f"{self._platform_name}_{self.entity_description.key}"
+        value = self._hub.data.value(self._index)
+        return None if value is None else value != 0
 
     @property
     def icon(self) -> Optional[str]:
@@ -93,20 +45,10 @@ class FuturaModbusSwitch(SwitchEntity):
 
     async def async_turn_on(self, **kwargs: Any) -> None:
         """Turn on the switch entity."""
-
-        if hasattr(self.entity_description, "address"):
-            self.hass.async_add_executor_job(
-                self._hub.write_register,
-                self.entity_description.address,
-                1,
-            )
+        if not await self._hub.async_write_data(self.entity_description.key, 1):
+            raise HomeAssistantError(f"Failed to turn on {self.name}")
 
     async def async_turn_off(self, **kwargs: Any) -> None:
         """Turn off the switch entity."""
-
-        if hasattr(self.entity_description, "address"):
-            self.hass.async_add_executor_job(
-                self._hub.write_register,
-                self.entity_description.address,
-                0,
-            )
+        if not await self._hub.async_write_data(self.entity_description.key, 0):
+            raise HomeAssistantError(f"Failed to turn off {self.name}")
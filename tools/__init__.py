@@ -0,0 +1 @@
+"""Development tools for the Futura Modbus integration."""
@@ -0,0 +1,284 @@
+"""Benchmark of the poll and write paths of FuturaModbusHub.
+
+Runs real hubs against in-process simulators and reports, per mode, the poll
+cycle latency, transactions and bytes per cycle, decode and fan-out time and
+the write round trip:
+
+    python -m tools.benchmark --hubs 4 --cycles 200 --output before.json
+
+Modes:
+    serial     one request in flight per hub
+    pipelined  requests pipelined up to the default depth
+    gateway    all hubs as units behind one simulated gateway
+
+Needs Home Assistant installed; run it from the repository root.
+"""
+import argparse
+import asyncio
+import json
+import platform
+import statistics
+import tempfile
+import time
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.futura_modbus import FuturaModbusHub
+from custom_components.futura_modbus.const import (
+    NUMBER_TYPES,
+    SENSOR_TYPES,
+    SWITCH_TYPES,
+    peripheral_sensor_descriptions,
+)
+from custom_components.futura_modbus.modbus import DEFAULT_PIPELINE_DEPTH
+from custom_components.futura_modbus.scheduler import FuturaScheduler
+
+from .simulator import FuturaSimulator, SimulatorConfig
+
+MODES = {
+    "serial": {"pipeline_depth": 1, "shared": False},
+    "pipelined": {"pipeline_depth": DEFAULT_PIPELINE_DEPTH, "shared": False},
+    "gateway": {"pipeline_depth": DEFAULT_PIPELINE_DEPTH, "shared": True},
+}
+# long enough for the hub's own timers to stay out of the measured cycles
+IDLE_SCAN_INTERVAL = 3600
+DECODE_REPEAT = 100
+WRITE_KEY = "cfg_temp_set"
+
+
+def summarize(samples):
+    """Return p50/p95/p99, mean and max of samples in milliseconds."""
+    if not samples:
+        return None
+    samples = [sample * 1000 for sample in samples]
+    if len(samples) == 1:
+        percentiles = samples * 99
+    else:
+        percentiles = statistics.quantiles(samples, n=100, method="inclusive")
+    return {
+        "p50": round(percentiles[49], 3),
+        "p95": round(percentiles[94], 3),
+        "p99": round(percentiles[98], 3),
+        "mean": round(statistics.fmean(samples), 3),
+        "max": round(max(samples), 3),
+        "count": len(samples),
+    }
+
+
+def _descriptions(hub):
+    """Return the entity descriptions the platforms would create for hub."""
+    descriptions = [
+        *SENSOR_TYPES.values(),
+        *NUMBER_TYPES.values(),
+        *SWITCH_TYPES.values(),
+    ]
+    for peripheral in hub.peripherals:
+        descriptions.extend(peripheral_sensor_descriptions(peripheral))
+    return descriptions
+
+
+class FanOut:
+    """Stand-in entities counting the updates they receive."""
+
+    def __init__(self, hub):
+        self.hub = hub
+        self.updates = 0
+        self.removers = []
+
+    def subscribe(self):
+        """Register one callback per entity description, like the platforms."""
+        for description in _descriptions(self.hub):
+            index = self.hub.data.index(description.key)
+
+            def update(index=index):
+                # what async_write_ha_state reads from the hub
+                self.hub.data.value(index)
+                self.updates += 1
+
+            self.removers.append(self.hub.async_add_listener(update, description))
+
+    def unsubscribe(self):
+        """Remove the callbacks again."""
+        for remove in self.removers:
+            remove()
+
+
+async def run_mode(hass, mode, args):
+    """Measure one mode and return its results."""
+    options = MODES[mode]
+    config = SimulatorConfig(
+        port=0,
+        latency=args.latency,
+        jitter=args.jitter,
+        loss=args.loss,
+        service_time={3: args.service_time, 4: args.service_time},
+        sensors=args.sensors,
+        update_interval=args.update_interval,
+        seed=args.seed,
+    )
+    simulators = [
+        FuturaSimulator(config) for _ in range(1 if options["shared"] else args.hubs)
+    ]
+    for simulator in simulators:
+        await simulator.start()
+
+    scheduler = FuturaScheduler()
+    hubs = []
+    for index in range(args.hubs):
+        simulator = simulators[0 if options["shared"] else index]
+        hub = FuturaModbusHub(
+            hass,
+            f"bench_{mode}_{index}",
+            "127.0.0.1",
+            simulator.port,
+            IDLE_SCAN_INTERVAL,
+            pipeline_depth=options["pipeline_depth"],
+            unit_id=index + 1,
+            storage_key=f"futura_modbus_benchmark_{mode}_{index}",
+            scheduler=scheduler,
+        )
+        scheduler.async_add_hub(hub)
+        hubs.append(hub)
+
+    fan_outs = []
+    try:
+        for hub in hubs:
+            await hub.async_discover_peripherals()
+            await hub.async_refresh()
+            fan_out = FanOut(hub)
+            fan_out.subscribe()
+            fan_outs.append(fan_out)
+
+        cycle_times = []
+        fan_out_times = []
+        updates = []
+        requests_before = sum(sim.stats.total_requests for sim in simulators)
+        bytes_before = sum(
+            sim.stats.bytes_in + sim.stats.bytes_out for sim in simulators
+        )
+        failed = 0
+
+        async def cycle(hub, fan_out):
+            nonlocal failed
+            start = time.perf_counter()
+            if not await hub.async_read_modbus_data():
+                failed += 1
+            cycle_times.append(time.perf_counter() - start)
+            before = fan_out.updates
+            start = time.perf_counter()
+            hub.async_update_listeners()
+            fan_out_times.append(time.perf_counter() - start)
+            updates.append(fan_out.updates - before)
+
+        for _ in range(args.cycles):
+            await asyncio.gather(
+                *(cycle(hub, fan_out) for hub, fan_out in zip(hubs, fan_outs))
+            )
+            if args.cycle_interval:
+                await asyncio.sleep(args.cycle_interval)
+
+        hub_cycles = args.cycles * len(hubs)
+        requests = sum(sim.stats.total_requests for sim in simulators)
+        wire_bytes = sum(sim.stats.bytes_in + sim.stats.bytes_out for sim in simulators)
+
+        # the plan covers the registers of the listeners, so take it before
+        # they unsubscribe
+        plan = hubs[0].read_plan()
+        decode_times = []
+        for block in plan:
+            payload = await hubs[0].async_read_block(block)
+            if payload is None:
+                continue
+            start = time.perf_counter()
+            for _ in range(DECODE_REPEAT):
+                block.decode(payload)
+            decode_times.append((time.perf_counter() - start) / DECODE_REPEAT)
+
+        write_times = []
+        write_failures = 0
+        for index in range(args.writes):
+            hub = hubs[index % len(hubs)]
+            start = time.perf_counter()
+            if not await hub.async_write_data(WRITE_KEY, 20 + index % 5):
+                write_failures += 1
+            write_times.append(time.perf_counter() - start)
+    finally:
+        for fan_out in fan_outs:
+            fan_out.unsubscribe()
+        for hub in hubs:
+            scheduler.async_remove_hub(hub)
+            await hub.async_shutdown()
+        for simulator in simulators:
+            await simulator.stop()
+
+    return {
+        "hubs": len(hubs),
+        "pipeline_depth": options["pipeline_depth"],
+        "cycle_latency_ms": summarize(cycle_times),
+        "failed_cycles": failed,
+        "transactions_per_cycle": round((requests - requests_before) / hub_cycles, 2),
+        "bytes_per_cycle": round((wire_bytes - bytes_before) / hub_cycles, 1),
+        "blocks_per_cycle": len(plan),
+        "decode_us_per_cycle": round(sum(decode_times) * 1e6, 2),
+        "fan_out_ms": summarize(fan_out_times),
+        "updates_per_cycle": round(statistics.fmean(updates), 2) if updates else 0,
+        "write_round_trip_ms": summarize(write_times),
+        "failed_writes": write_failures,
+    }
+
+
+async def run(args):
+    """Run the selected modes and return the report."""
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        results = {}
+        try:
+            for mode in args.modes:
+                results[mode] = await run_mode(hass, mode, args)
+        finally:
+            await hass.async_stop(force=True)
+    return {
+        "python": platform.python_version(),
+        "arguments": {
+            key: value for key, value in vars(args).items() if key != "output"
+        },
+        "results": results,
+    }
+
+
+def main():
+    """Run the benchmark and print or save the JSON report."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--modes",
+        type=lambda value: value.split(","),
+        default=list(MODES),
+        help=f"comma separated, of {', '.join(MODES)}",
+    )
+    parser.add_argument("--hubs", type=int, default=1)
+    parser.add_argument("--cycles", type=int, default=100)
+    parser.add_argument("--writes", type=int, default=20)
+    parser.add_argument("--cycle-interval", type=float, default=0.0)
+    parser.add_argument("--latency", type=float, default=0.005, help="seconds")
+    parser.add_argument("--jitter", type=float, default=0.002, help="seconds")
+    parser.add_argument("--loss", type=float, default=0.0, help="probability")
+    parser.add_argument("--service-time", type=float, default=0.002, help="seconds")
+    parser.add_argument("--sensors", type=int, default=2)
+    parser.add_argument("--update-interval", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="file to write the JSON report to")
+    args = parser.parse_args()
+    unknown = set(args.modes) - set(MODES)
+    if unknown:
+        parser.error(f"unknown modes: {', '.join(sorted(unknown))}")
+
+    report = asyncio.run(run(args))
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
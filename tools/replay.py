@@ -0,0 +1,136 @@
+"""Replay of a Modbus traffic capture through FuturaModbusHub.
+
+Feeds a capture written with the capture option back into a real hub, with
+the recorded round trip times and failures, and reports the poll cycle
+latency and the client's metrics:
+
+    python -m tools.replay futura_modbus_futura.capture.jsonl --speed 10
+
+Speed 1 replays at the recorded pace, higher values faster and 0 as fast as
+possible. Rotated backups of the capture are replayed along with it.
+
+Needs Home Assistant installed; run it from the repository root.
+"""
+import argparse
+import asyncio
+from collections import Counter
+from functools import partial
+import json
+import statistics
+import tempfile
+import time
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.futura_modbus import FuturaModbusHub
+from custom_components.futura_modbus.capture import FuturaReplayClient, load_capture
+from custom_components.futura_modbus.modbus import DEFAULT_PIPELINE_DEPTH
+from custom_components.futura_modbus.scheduler import FuturaScheduler
+
+from .benchmark import FanOut, IDLE_SCAN_INTERVAL, summarize
+
+
+def recorded_period(capture):
+    """Return the median interval between repeats of the most polled request."""
+    if not capture:
+        return 0.0
+    requests = Counter((entry["unit"], entry["request"]) for entry in capture)
+    (unit, request), _ = requests.most_common(1)[0]
+    times = [
+        entry["t"]
+        for entry in capture
+        if entry["unit"] == unit and entry["request"] == request
+    ]
+    gaps = [later - earlier for earlier, later in zip(times, times[1:])]
+    return statistics.median(gaps) if gaps else 0.0
+
+
+async def replay(hass, capture, args):
+    """Poll a hub answered from capture and return the results."""
+    unit_id = args.unit_id
+    if unit_id is None:
+        unit_id = Counter(entry["unit"] for entry in capture).most_common(1)[0][0]
+    period = args.period if args.period is not None else recorded_period(capture)
+    scheduler = FuturaScheduler(
+        client_factory=partial(FuturaReplayClient, capture, speed=args.speed)
+    )
+    hub = FuturaModbusHub(
+        hass,
+        "replay",
+        "replay",
+        0,
+        IDLE_SCAN_INTERVAL,
+        pipeline_depth=args.pipeline_depth,
+        unit_id=unit_id,
+        storage_key="futura_modbus_replay",
+        scheduler=scheduler,
+    )
+    scheduler.async_add_hub(hub)
+
+    fan_out = None
+    cycle_times = []
+    failed = 0
+    try:
+        identity = await hub.async_read_identity()
+        if identity is not None:
+            hub.async_set_identity(identity)
+        await hub.async_discover_peripherals()
+        fan_out = FanOut(hub)
+        fan_out.subscribe()
+        pace = period / args.speed if args.speed else 0.0
+        for _ in range(args.cycles):
+            start = time.perf_counter()
+            if not await hub.async_read_modbus_data():
+                failed += 1
+            elapsed = time.perf_counter() - start
+            cycle_times.append(elapsed)
+            hub.async_update_listeners()
+            if pace > elapsed:
+                await asyncio.sleep(pace - elapsed)
+    finally:
+        if fan_out is not None:
+            fan_out.unsubscribe()
+        scheduler.async_remove_hub(hub)
+        await hub.async_shutdown()
+
+    return {
+        "transactions": len(capture),
+        "unit_id": unit_id,
+        "recorded_period_s": round(period, 3),
+        "peripherals": [peripheral.key for peripheral in hub.peripherals],
+        "cycle_latency_ms": summarize(cycle_times),
+        "failed_cycles": failed,
+        "client": hub.client_metrics.as_dict(),
+    }
+
+
+async def run(args):
+    """Replay the capture and return the report."""
+    capture = load_capture(args.capture)
+    if not capture:
+        raise SystemExit(f"{args.capture} holds no transactions")
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        try:
+            return await replay(hass, capture, args)
+        finally:
+            await hass.async_stop(force=True)
+
+
+def main():
+    """Run the replay and print the JSON report."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("capture", help="capture file, without the rotation suffix")
+    parser.add_argument("--speed", type=float, default=1.0)
+    parser.add_argument("--cycles", type=int, default=100)
+    parser.add_argument(
+        "--period", type=float, help="seconds between polls, recorded by default"
+    )
+    parser.add_argument("--pipeline-depth", type=int, default=DEFAULT_PIPELINE_DEPTH)
+    parser.add_argument("--unit-id", type=int, help="most frequent in the capture")
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,433 @@
+"""Modbus TCP simulator of a Futura unit.
+
+Serves the Futura register map over Modbus TCP so the integration can be run
+and measured without hardware:
+
+    python -m tools.simulator --port 5020 --latency 0.02 --jitter 0.01
+
+Network conditions (latency, jitter, lost requests, dropped connections) and
+the service time of the device per function code are configurable. Requests
+are served one at a time, like the device does, and writes are logged.
+"""
+import argparse
+import asyncio
+from dataclasses import dataclass, field
+import json
+import logging
+import random
+import struct
+import time
+from typing import Optional
+
+_LOGGER = logging.getLogger(__name__)
+
+MBAP_HEADER = struct.Struct(">HHHB")
+
+READ_HOLDING_REGISTERS = 0x03
+READ_INPUT_REGISTERS = 0x04
+WRITE_SINGLE_REGISTER = 0x06
+WRITE_MULTIPLE_REGISTERS = 0x10
+
+EXCEPTION_FLAG = 0x80
+ILLEGAL_FUNCTION = 0x01
+ILLEGAL_DATA_ADDRESS = 0x02
+ILLEGAL_DATA_VALUE = 0x03
+SERVER_BUSY = 0x06
+
+INPUT_REGISTER_COUNT = 236
+HOLDING_REGISTER_COUNT = 474
+
+DEVICE_ID = 39
+# sys_options codes, see DEVICE_MODEL
+MODEL_CODES = {"L": 1, "M": 2}
+
+
+@dataclass
+class SimulatorConfig:
+    """Behaviour of the simulated device and network."""
+
+    host: str = "127.0.0.1"
+    port: int = 5020
+    # seconds added to every reply, plus up to jitter seconds at random
+    latency: float = 0.0
+    jitter: float = 0.0
+    # probability of a request getting no reply, and of the connection closing
+    loss: float = 0.0
+    disconnect: float = 0.0
+    # seconds the device is busy per request, by function code
+    service_time: dict[int, float] = field(default_factory=dict)
+    # requests in flight beyond which the device replies busy, 0 for no limit
+    max_in_flight: int = 0
+    model: str = "L"
+    uis: int = 1
+    sensors: int = 1
+    alfas: int = 0
+    ext_sensors: int = 0
+    buttons: int = 0
+    # seconds between changes of the live values, 0 to keep them fixed
+    update_interval: float = 1.0
+    seed: Optional[int] = None
+
+
+@dataclass
+class SimulatorStats:
+    """Counters of the traffic served."""
+
+    requests: dict[int, int] = field(default_factory=dict)
+    lost: int = 0
+    disconnects: int = 0
+    busy: int = 0
+    exceptions: int = 0
+    connections: int = 0
+    bytes_in: int = 0
+    bytes_out: int = 0
+
+    @property
+    def total_requests(self) -> int:
+        """Return the number of requests received."""
+        return sum(self.requests.values())
+
+    def as_dict(self) -> dict:
+        """Return the counters as plain data."""
+        return {
+            "requests": {f"FC{code}": count for code, count in self.requests.items()},
+            "lost": self.lost,
+            "disconnects": self.disconnects,
+            "busy": self.busy,
+            "exceptions": self.exceptions,
+            "connections": self.connections,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+        }
+
+
+class FuturaSimulator:
+    """Asyncio Modbus TCP server emulating a Futura unit."""
+
+    def __init__(self, config: Optional[SimulatorConfig] = None):
+        """Initialize the simulator."""
+        self.config = config or SimulatorConfig()
+        self.input = [0] * INPUT_REGISTER_COUNT
+        self.holding = [0] * HOLDING_REGISTER_COUNT
+        self.stats = SimulatorStats()
+        # (time, unit id, address, values) of every write served
+        self.writes: list[tuple[float, int, int, list[int]]] = []
+        self._random = random.Random(self.config.seed)
+        self._device_lock = asyncio.Lock()
+        self._in_flight = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._update_task: Optional[asyncio.Task] = None
+        self._connections: dict[asyncio.StreamWriter, asyncio.Task] = {}
+        self._load_defaults()
+
+    @property
+    def port(self) -> int:
+        """Return the port the server listens on."""
+        if self._server is None:
+            return self.config.port
+        return self._server.sockets[0].getsockname()[1]
+
+    async def start(self) -> None:
+        """Start serving."""
+        self._server = await asyncio.start_server(
+            self._handle_connection, self.config.host, self.config.port
+        )
+        if self.config.update_interval > 0:
+            self._update_task = asyncio.create_task(self._update_loop())
+        _LOGGER.info(
+            "Futura simulator listening on %s:%s", self.config.host, self.port
+        )
+
+    async def stop(self) -> None:
+        """Stop serving and drop the open connections."""
+        if self._update_task is not None:
+            self._update_task.cancel()
+            self._update_task = None
+        if self._server is not None:
+            self._server.close()
+            connections = list(self._connections.items())
+            for writer, _ in connections:
+                writer.close()
+            # the handlers end on the end of stream of their closed connection
+            await asyncio.gather(
+                *(task for _, task in connections), return_exceptions=True
+            )
+            await self._server.wait_closed()
+            self._server = None
+
+    async def __aenter__(self) -> "FuturaSimulator":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.stop()
+
+    def _load_defaults(self) -> None:
+        """Fill the register map with plausible values."""
+        config = self.config
+        inputs = {
+            0: DEVICE_ID,
+            1: 0x0001,
+            2: 0xE240,  # serial number 123456
+            3: 0x0011,
+            4: 0x2233,
+            5: 0x4455,
+            14: MODEL_CODES.get(config.model, 0),
+            16: 0,
+            17: 1,
+            30: 52,
+            31: 180,
+            32: 221,
+            33: 95,
+            34: 650,
+            35: 420,
+            36: 450,
+            37: 700,
+            38: 55,
+            40: 12,
+            41: 45,
+            42: 820,
+            43: 0,
+            44: 150,
+            45: 40,
+            46: 42,
+            47: 1500,
+            48: 1550,
+            52: 3012,
+            66: _mask(config.uis),
+            68: _mask(config.sensors),
+            74: _mask(config.buttons),
+            75: _mask(config.alfas),
+        }
+        for address, value in inputs.items():
+            self.input[address] = value & 0xFFFF
+
+        for index in range(config.uis):
+            self._set_room(100 + 5 * index, 10 + index)
+        for index in range(config.sensors):
+            self._set_room(115 + 5 * index, 20 + index)
+        for index in range(config.alfas):
+            base = 160 + 10 * index
+            self._set_room(base, 30 + index)
+            self.input[base + 5] = 230
+
+        holdings = {10: 220, 11: 500, 14: 1, 15: 1}
+        for address, value in holdings.items():
+            self.holding[address] = value
+        for index in range(config.ext_sensors):
+            base = 300 + 10 * index
+            self.holding[base : base + 6] = [1, 0, 210, 45, 700, 240]
+        for index in range(config.buttons):
+            base = 400 + 10 * index
+            self.holding[base] = 1
+
+    def _set_room(self, base: int, address: int) -> None:
+        """Fill the block of a room unit: address, options, co2, temp, humi."""
+        self.input[base : base + 5] = [address, 0, 600, 215, 450]
+
+    async def _update_loop(self) -> None:
+        """Let the live values wander like a running unit."""
+        live = [30, 31, 32, 33, 34, 35, 36, 37, 38, 41, 42, 44, 47, 48]
+        while True:
+            await asyncio.sleep(self.config.update_interval)
+            for address in live:
+                step = self._random.choice((-1, 0, 0, 1))
+                self.input[address] = max(0, self.input[address] + step) & 0xFFFF
+
+    async def _handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """Serve the requests of one client, pipelined."""
+        self.stats.connections += 1
+        self._connections[writer] = asyncio.current_task()
+        tasks = set()
+        try:
+            while True:
+                header = await reader.readexactly(MBAP_HEADER.size)
+                transaction_id, protocol_id, length, unit_id = MBAP_HEADER.unpack(
+                    header
+                )
+                if length < 2:
+                    break
+                pdu = await reader.readexactly(length - 1)
+                self.stats.bytes_in += len(header) + len(pdu)
+                task = asyncio.create_task(
+                    self._serve(writer, transaction_id, unit_id, pdu)
+                )
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            for task in tasks:
+                task.cancel()
+            self._connections.pop(writer, None)
+            writer.close()
+
+    async def _serve(
+        self,
+        writer: asyncio.StreamWriter,
+        transaction_id: int,
+        unit_id: int,
+        pdu: bytes,
+    ) -> None:
+        """Answer one request after the configured delays."""
+        config = self.config
+        function_code = pdu[0]
+        self.stats.requests[function_code] = (
+            self.stats.requests.get(function_code, 0) + 1
+        )
+        if self._random.random() < config.disconnect:
+            self.stats.disconnects += 1
+            writer.close()
+            return
+        if self._random.random() < config.loss:
+            self.stats.lost += 1
+            return
+
+        self._in_flight += 1
+        try:
+            if config.max_in_flight and self._in_flight > config.max_in_flight:
+                self.stats.busy += 1
+                response = bytes((function_code | EXCEPTION_FLAG, SERVER_BUSY))
+            else:
+                async with self._device_lock:
+                    await asyncio.sleep(config.service_time.get(function_code, 0))
+                    response = self._execute(unit_id, pdu)
+            await asyncio.sleep(config.latency + self._random.uniform(0, config.jitter))
+        finally:
+            self._in_flight -= 1
+
+        if writer.is_closing():
+            return
+        frame = MBAP_HEADER.pack(transaction_id, 0, len(response) + 1, unit_id)
+        self.stats.bytes_out += len(frame) + len(response)
+        writer.write(frame + response)
+        await writer.drain()
+
+    def _execute(self, unit_id: int, pdu: bytes) -> bytes:
+        """Apply a request PDU to the registers and return the response PDU."""
+        function_code = pdu[0]
+        try:
+            if function_code in (READ_HOLDING_REGISTERS, READ_INPUT_REGISTERS):
+                address, count = struct.unpack_from(">HH", pdu, 1)
+                table = (
+                    self.holding
+                    if function_code == READ_HOLDING_REGISTERS
+                    else self.input
+                )
+                if not 1 <= count <= 125:
+                    return self._exception(function_code, ILLEGAL_DATA_VALUE)
+                if address + count > len(table):
+                    return self._exception(function_code, ILLEGAL_DATA_ADDRESS)
+                values = table[address : address + count]
+                return struct.pack(f">BB{count}H", function_code, 2 * count, *values)
+
+            if function_code == WRITE_SINGLE_REGISTER:
+                address, value = struct.unpack_from(">HH", pdu, 1)
+                if address >= len(self.holding):
+                    return self._exception(function_code, ILLEGAL_DATA_ADDRESS)
+                self._write(unit_id, address, [value])
+                return pdu[:5]
+
+            if function_code == WRITE_MULTIPLE_REGISTERS:
+                address, count, byte_count = struct.unpack_from(">HHB", pdu, 1)
+                if not 1 <= count <= 123 or byte_count != 2 * count:
+                    return self._exception(function_code, ILLEGAL_DATA_VALUE)
+                if address + count > len(self.holding):
+                    return self._exception(function_code, ILLEGAL_DATA_ADDRESS)
+                values = list(struct.unpack_from(f">{count}H", pdu, 6))
+                self._write(unit_id, address, values)
+                return pdu[:5]
+        except struct.error:
+            return self._exception(function_code, ILLEGAL_DATA_VALUE)
+        return self._exception(function_code, ILLEGAL_FUNCTION)
+
+    def _write(self, unit_id: int, address: int, values: list[int]) -> None:
+        """Store written values and log them."""
+        self.holding[address : address + len(values)] = values
+        self.writes.append((time.time(), unit_id, address, values))
+        _LOGGER.info("Unit %s wrote %s at %s", unit_id, values, address)
+
+    def _exception(self, function_code: int, code: int) -> bytes:
+        """Return an exception response PDU."""
+        self.stats.exceptions += 1
+        return bytes((function_code | EXCEPTION_FLAG, code))
+
+
+def _mask(count: int) -> int:
+    """Return the bitmask of the first count units."""
+    return (1 << count) - 1
+
+
+def _service_time(value: str) -> tuple[int, float]:
+    """Parse a FC=SECONDS service time argument."""
+    code, _, seconds = value.partition("=")
+    return int(code, 0), float(seconds)
+
+
+def main() -> None:
+    """Run the simulator until interrupted."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5020)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="seconds")
+    parser.add_argument("--loss", type=float, default=0.0, help="probability")
+    parser.add_argument("--disconnect", type=float, default=0.0, help="probability")
+    parser.add_argument(
+        "--service-time",
+        type=_service_time,
+        action="append",
+        default=[],
+        metavar="FC=SECONDS",
+        help="time the device is busy per request of a function code",
+    )
+    parser.add_argument("--max-in-flight", type=int, default=0)
+    parser.add_argument("--model", choices=sorted(MODEL_CODES), default="L")
+    parser.add_argument("--uis", type=int, default=1)
+    parser.add_argument("--sensors", type=int, default=1)
+    parser.add_argument("--alfas", type=int, default=0)
+    parser.add_argument("--ext-sensors", type=int, default=0)
+    parser.add_argument("--buttons", type=int, default=0)
+    parser.add_argument("--update-interval", type=float, default=1.0)
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    config = SimulatorConfig(
+        host=args.host,
+        port=args.port,
+        latency=args.latency,
+        jitter=args.jitter,
+        loss=args.loss,
+        disconnect=args.disconnect,
+        service_time=dict(args.service_time),
+        max_in_flight=args.max_in_flight,
+        model=args.model,
+        uis=args.uis,
+        sensors=args.sensors,
+        alfas=args.alfas,
+        ext_sensors=args.ext_sensors,
+        buttons=args.buttons,
+        update_interval=args.update_interval,
+        seed=args.seed,
+    )
+
+    async def run():
+        simulator = FuturaSimulator(config)
+        await simulator.start()
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await simulator.stop()
+            print(json.dumps(simulator.stats.as_dict(), indent=2))
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()